@@ -0,0 +1,33 @@
+import argparse
+import sys
+from src.batch import run_batch
+from src.blending import BLENDERS
+from src.face_swap import WARP_MODES, TOPOLOGIES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Swap one source face into a directory of images.")
+    parser.add_argument("source", help="image with the source face")
+    parser.add_argument("dest", help="directory or glob of destination images, e.g. images/dataset")
+    parser.add_argument("output", help="directory the swapped images are written to")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--warp-mode", choices=WARP_MODES, default="dense")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="canonical")
+    parser.add_argument("--blend", choices=list(BLENDERS), default="seamless")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = run_batch(
+        args.source, args.dest, args.output,
+        workers=args.workers,
+        swapper_kwargs={"warp_mode": args.warp_mode, "topology": args.topology, "blend": args.blend}
+    )
+    print(f"Processed {summary['images']} images in {summary['seconds']:.1f}s "
+          f"({summary['images_per_second']:.1f} images/s): {summary['counts']}")
+    return 0 if summary["images"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import argparse
+import sys
+from src.benchmark import RESOLUTIONS, compare, load_report, run_benchmark, save_report
+from src.blending import BLENDERS
+from src.face_swap import WARP_MODES, TOPOLOGIES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the face swap and check for regressions.")
+    parser.add_argument("--source", default=None, help="image with the source face (default: first dataset image)")
+    parser.add_argument("--dataset", default="images/dataset", help="directory or glob of destination images")
+    parser.add_argument("--resolutions", nargs="*", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage and image")
+    parser.add_argument("--max-images", type=int, default=None)
+    parser.add_argument("--warp-mode", choices=WARP_MODES, default="triangles")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="canonical")
+    parser.add_argument("--blend", choices=list(BLENDERS), default="seamless")
+    parser.add_argument("--two-stage", action="store_true", help="run FaceMesh on face crops found by a face detector")
+    parser.add_argument("--output", default="benchmark.json", help="where the JSON report is written")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging, 0.10 = 10%%")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmark(
+        source_path=args.source,
+        dataset=args.dataset,
+        resolutions=args.resolutions,
+        repeat=args.repeat,
+        max_images=args.max_images,
+        swapper_kwargs={"warp_mode": args.warp_mode, "topology": args.topology, "blend": args.blend,
+                        "two_stage": args.two_stage}
+    )
+    save_report(report, args.output)
+    print(f"Report written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    regressions = compare(report, load_report(args.baseline), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['resolution']}/{r['stage']}: "
+              f"{r['baseline_ms']:.2f} ms -> {r['current_ms']:.2f} ms (+{r['change'] * 100:.0f}%)")
+    if not regressions:
+        print(f"No stage slower than {args.baseline} by more than {args.tolerance * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
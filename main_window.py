@@ -1,3 +1,4 @@
+from src.startup import STARTUP
 import sys
 from PyQt5.QtWidgets import (
     QApplication,
@@ -6,30 +7,63 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QLabel
 )
-from src.realtime_swap import RealTimeFaceSwapTab  
-from src.image_swap import ImageSwapTab       
-from src.face_swap import FaceSwapper         
+from PyQt5.QtCore import QTimer
 
 class MainWindow(QTabWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Face Swapper Application")
-        self.setGeometry(100, 100, 1200, 1000) 
+        self.setGeometry(100, 100, 1200, 1000)
 
-        self.face_swapper = FaceSwapper()  
+        # Swapper for the real-time tab, created with that tab
+        self.face_swapper = None
 
-        # Add tabs
-        self.addTab(self.real_time_tab(), "Real-Time Face Swap")
-        self.addTab(self.image_tab(), "Image Face Swap")
-        self.addTab(self.synthetic_tab(), "Generate Synthetic Face")
+        # Add tabs, each one is an empty page until it is first shown
+        self.tab_factories = [self.real_time_tab, self.image_tab, self.synthetic_tab]
+        self.built_tabs = {}
+        for title in ("Real-Time Face Swap", "Image Face Swap", "Generate Synthetic Face"):
+            page = QWidget()
+            QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+            self.addTab(page, title)
+        self.currentChanged.connect(self.build_tab)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Let the empty window paint first, then fill in the visible tab
+        QTimer.singleShot(0, self.on_first_show)
+
+    def on_first_show(self):
+        if STARTUP.reached("first_window"):
+            return
+        STARTUP.mark("first_window")
+        self.build_tab(self.currentIndex())
+
+    def build_tab(self, index):
+        """Creates the widget of tab index the first time it is activated."""
+        if index < 0 or index in self.built_tabs:
+            return
+        widget = self.tab_factories[index]()
+        self.built_tabs[index] = widget
+        self.widget(index).layout().addWidget(widget)
 
     def real_time_tab(self):
         """Creates the Real-Time Face Swap tab."""
+        # Imported here so the window shows before OpenCV and the swap modules load
+        from src.face_swap import FaceSwapper
+        from src.realtime_swap import RealTimeFaceSwapTab
+        from src.source_cache import SourceCache
+
+        # Models and camera warm up in the background, the tab shows their progress
+        # Live video smooths the landmarks and skips re-warping faces that hold still
+        self.face_swapper = FaceSwapper(source_cache=SourceCache(), smoothing=True, reuse=True)
         real_time_widget = RealTimeFaceSwapTab(self.face_swapper)
+        if STARTUP.reached("first_window"):
+            real_time_widget.log_message(f"Window shown {STARTUP.marks['first_window']:.0f} ms after launch.")
         return real_time_widget
 
     def image_tab(self):
         """Creates the Image Face Swap tab."""
+        from src.image_swap import ImageSwapTab
         image_swap_widget = ImageSwapTab()
         return image_swap_widget
 
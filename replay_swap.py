@@ -0,0 +1,78 @@
+import argparse
+import sys
+from src.benchmark import compare, load_report, save_report
+from src.blending import BLENDERS
+from src.face_swap import WARP_MODES
+from src.recording import CODECS
+from src.replay import record_camera, run_replay
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record a camera stream, or replay one through the live swap pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record camera frames with their timestamps")
+    record.add_argument("output", help="recording file to write")
+    record.add_argument("--seconds", type=float, default=10.0)
+    record.add_argument("--camera", type=int, default=0)
+    record.add_argument("--width", type=int, default=640)
+    record.add_argument("--height", type=int, default=480)
+    record.add_argument("--codec", choices=list(CODECS), default=".png", help=".png is lossless, .jpg smaller")
+
+    replay = commands.add_parser("replay", help="swap a recording and report latency, drops and FPS")
+    replay.add_argument("recording", help="file written by the record command")
+    replay.add_argument("--source", required=True, help="image with the source face")
+    replay.add_argument("--max-speed", action="store_true", help="feed frames as fast as they are taken, not at the recorded pace")
+    replay.add_argument("--serial", action="store_true", help="capture, swap and display one after another like the timer mode")
+    replay.add_argument("--warp-mode", choices=WARP_MODES, default="triangles")
+    replay.add_argument("--blend", choices=list(BLENDERS), default="seamless")
+    replay.add_argument("--no-smoothing", action="store_true")
+    replay.add_argument("--no-reuse", action="store_true")
+    replay.add_argument("--tracking", action="store_true")
+    replay.add_argument("--two-stage", action="store_true")
+    replay.add_argument("--adaptive", action="store_true", help="let the adaptive quality controller run")
+    replay.add_argument("--target-fps", type=int, default=25)
+    replay.add_argument("--output", default="replay.json", help="where the JSON report is written")
+    replay.add_argument("--baseline", default=None, help="earlier JSON report to compare against")
+    replay.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging, 0.10 = 10%%")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "record":
+        written = record_camera(args.output, args.seconds, args.camera, args.width, args.height, args.codec)
+        print(f"{written} frames written to {args.output}")
+        return 0 if written else 1
+
+    report = run_replay(
+        args.recording, args.source,
+        paced=not args.max_speed,
+        pipelined=not args.serial,
+        swapper_kwargs={
+            "warp_mode": args.warp_mode,
+            "blend": args.blend,
+            "smoothing": not args.no_smoothing,
+            "reuse": not args.no_reuse,
+            "tracking": args.tracking,
+            "two_stage": args.two_stage,
+        },
+        adaptive=args.adaptive,
+        target_fps=args.target_fps
+    )
+    save_report(report, args.output)
+    print(f"Report written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    regressions = compare(report, load_report(args.baseline), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['stage']}: "
+              f"{r['baseline_ms']:.2f} ms -> {r['current_ms']:.2f} ms (+{r['change'] * 100:.0f}%)")
+    if not regressions:
+        print(f"Nothing slower than {args.baseline} by more than {args.tolerance * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
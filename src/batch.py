@@ -0,0 +1,116 @@
+# Headless face swapping over many images with a process pool
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from src.face_swap import FaceSwapper
+from src.frame_source import ImageDirectorySource
+
+# One warmed-up FaceSwapper per worker process, set by init_worker
+_worker_swapper = None
+
+
+def init_worker(src_image_path, swapper_kwargs=None):
+    """Process pool initializer, builds and warms this worker's FaceSwapper once."""
+    global _worker_swapper
+    # The pool already uses every core, keep OpenCV from oversubscribing them
+    cv2.setNumThreads(1)
+    _worker_swapper = FaceSwapper(**(swapper_kwargs or {}))
+    _worker_swapper.set_src_image_path(src_image_path)
+    _worker_swapper.warmup()
+
+
+def swap_file(dest_path, output_path):
+    """Swap the worker's source face into one image file, returns (dest_path, status, seconds)."""
+    start = time.perf_counter()
+    dest_image = cv2.imread(dest_path)
+    if dest_image is None:
+        return dest_path, "unreadable", time.perf_counter() - start
+
+    try:
+        # Full resolution, single threaded since the pool already uses every core
+        result = _worker_swapper.swap_still(dest_image, workers=1)
+        # A failed write (disk full, bad path) must not be counted as swapped
+        if not cv2.imwrite(output_path, result):
+            return dest_path, "error: write failed", time.perf_counter() - start
+    except Exception as e:
+        return dest_path, f"error: {str(e)}", time.perf_counter() - start
+
+    # A face can be found yet not swapped, for example when its hull leaves the image
+    swapped = any(face["swapped"] for face in _worker_swapper.last_faces)
+    status = "swapped" if swapped else "no face"
+    return dest_path, status, time.perf_counter() - start
+
+
+def swap_frame(index, frame):
+    """Swap the worker's source face into an in-memory BGR frame, returns (index, result, face_found)."""
+    # Frames of one video reach the workers out of order, so every frame gets a full detection
+    # The frame arrived pickled, so this process owns it and the face can go straight in
+    result = _worker_swapper.process_frame(frame, detector=_worker_swapper.image_detector, in_place=True)
+    return index, result, _worker_swapper.last_face_found
+
+
+def list_images(dest):
+    """Image paths from a directory or a glob pattern, sorted."""
+    source = ImageDirectorySource(dest)
+    source.open()
+    return source.paths
+
+
+def output_paths_for(paths, output_dir):
+    """Output path per input, mirroring where it sits below the inputs' common directory.
+
+    Inputs from one directory keep their plain file names, a glob spanning several directories
+    gets the same subdirectories under output_dir so same-named files cannot overwrite each other.
+    Extensions OpenCV cannot write, like .jfif, get .jpg appended.
+    """
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    output_paths = []
+    for path in paths:
+        output_path = os.path.join(output_dir, os.path.relpath(os.path.abspath(path), root))
+        if not cv2.haveImageWriter(output_path):
+            output_path += ".jpg"
+        output_paths.append(output_path)
+    return output_paths
+
+
+def run_batch(src_image_path, dest, output_dir, workers=None, swapper_kwargs=None,
+              report_every=100, log=print):
+    """Swap src_image_path into every image matched by dest, writing results to output_dir."""
+    paths = list_images(dest)
+    os.makedirs(output_dir, exist_ok=True)
+    output_paths = output_paths_for(paths, output_dir)
+    for directory in {os.path.dirname(path) for path in output_paths}:
+        os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    counts = {}
+    start = time.perf_counter()
+    log(f"Swapping {len(paths)} images with {workers} workers")
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(src_image_path, swapper_kwargs)) as executor:
+        # Results stream back in order as soon as they are ready
+        results = executor.map(swap_file, paths, output_paths, chunksize=4)
+        for done, (dest_path, status, _) in enumerate(results, 1):
+            key = "error" if status.startswith("error") else status
+            counts[key] = counts.get(key, 0) + 1
+            if key in ("error", "unreadable"):
+                log(f"{dest_path}: {status}")
+            if done % report_every == 0 or done == len(paths):
+                elapsed = time.perf_counter() - start
+                rate = done / elapsed if elapsed > 0 else 0.0
+                eta = (len(paths) - done) / rate if rate > 0 else 0.0
+                log(f"[{done}/{len(paths)}] {rate:.1f} images/s, eta {eta:.0f}s")
+
+    elapsed = time.perf_counter() - start
+    return {
+        "images": len(paths),
+        "seconds": elapsed,
+        "images_per_second": len(paths) / elapsed if elapsed > 0 else 0.0,
+        "counts": counts,
+    }
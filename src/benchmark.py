@@ -0,0 +1,207 @@
+# Stage-level benchmark of the swap pipeline with JSON output for regression checks
+
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from src.face_mesh import dense_warp, get_face_roi, get_triangles, swap_new_face
+from src.face_swap import FaceSwapper
+from src.frame_source import ImageDirectorySource
+
+# Synthetic stream resolutions every dataset image is letterboxed into
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+STAGES = ("detect", "triangulate", "warp_triangles", "warp_dense", "swap_new_face", "process_frame")
+
+
+def letterbox(image, width, height):
+    """Fit image into a width x height frame keeping its aspect ratio."""
+    scale = min(width / image.shape[1], height / image.shape[0])
+    resized = cv2.resize(image, (int(image.shape[1] * scale), int(image.shape[0] * scale)))
+    frame = np.zeros((height, width, 3), np.uint8)
+    y = (height - resized.shape[0]) // 2
+    x = (width - resized.shape[1]) // 2
+    frame[y: y + resized.shape[0], x: x + resized.shape[1]] = resized
+    return frame
+
+
+def time_call(fn, repeat):
+    """Run fn repeat times after one warmup call, returns the durations in milliseconds."""
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000.0)
+    return durations
+
+
+def peak_memory(fn):
+    """Peak bytes allocated through Python and NumPy during one call of fn."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(durations, peaks):
+    durations = np.array(durations)
+    mean = float(durations.mean())
+    return {
+        "samples": int(durations.size),
+        "mean_ms": mean,
+        "p50_ms": float(np.percentile(durations, 50)),
+        "p99_ms": float(np.percentile(durations, 99)),
+        "fps": 1000.0 / mean if mean > 0 else 0.0,
+        "peak_mb": max(peaks) / (1024 * 1024),
+    }
+
+
+def bench_frame(swapper, frame, repeat, samples):
+    """Time every stage on one frame, appending to samples[stage] = (durations, peaks)."""
+    detector = swapper.image_detector
+
+    def record(stage, fn):
+        durations, peaks = samples.setdefault(stage, ([], []))
+        durations.extend(time_call(fn, repeat))
+        peaks.append(peak_memory(fn))
+
+    record("detect", lambda: detector.detect(frame))
+    landmark_points = detector.detect(frame)
+    if landmark_points is None:
+        return False
+
+    np_points = np.array(landmark_points, np.int32)
+    hull = cv2.convexHull(np_points)
+    record("triangulate", lambda: get_triangles(hull, landmark_points, np_points))
+
+    swapper.buffers.ensure(frame.shape)
+    x0, y0, x1, y1 = get_face_roi(hull, frame.shape)
+    offset = np.array([x0, y0], np.int32)
+    roi = frame[y0:y1, x0:x1]
+    roi_points = np_points - offset
+    roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+    def warp_triangles():
+        new_face, coverage = swapper.buffers.face_canvas(x1 - x0, y1 - y0)
+        swapper.warp_triangles(roi_points, new_face, coverage)
+
+    def warp_dense():
+        new_face, _ = swapper.buffers.face_canvas(x1 - x0, y1 - y0)
+        dense_warp(swapper.warp_plan, roi_points, new_face)
+
+    record("warp_triangles", warp_triangles)
+    record("warp_dense", warp_dense)
+
+    new_face = np.zeros_like(roi)
+    dense_warp(swapper.warp_plan, roi_points, new_face)
+    record("swap_new_face", lambda: swap_new_face(roi, roi_gray, hull - offset, new_face, blend=swapper.blend))
+    record("process_frame", lambda: swapper.process_frame(frame, detector=detector))
+    return True
+
+
+def run_benchmark(source_path=None, dataset="images/dataset", resolutions=None, repeat=5,
+                  max_images=None, swapper_kwargs=None, log=print):
+    """Benchmark every stage over the dataset images, native and letterboxed into each resolution."""
+    dataset_source = ImageDirectorySource(dataset)
+    dataset_source.open()
+    paths = dataset_source.paths[:max_images] if max_images else dataset_source.paths
+    if source_path is None:
+        if not paths:
+            raise ValueError(f"No images in {dataset} and no source image given")
+        source_path = paths[0]
+    if not paths:
+        # Nothing to swap into, fall back to the source face itself
+        log(f"No images in {dataset}, using {source_path} as the destination")
+        paths = [source_path]
+
+    swapper = FaceSwapper(**(swapper_kwargs or {}))
+    swapper.set_src_image_path(source_path)
+    swapper.warmup()
+
+    images = [(path, cv2.imread(path)) for path in paths]
+    images = [(path, image) for path, image in images if image is not None]
+    resolutions = resolutions or list(RESOLUTIONS)
+
+    results = {}
+    for resolution in ["native"] + resolutions:
+        samples = {}
+        skipped = 0
+        for path, image in images:
+            frame = image if resolution == "native" else letterbox(image, *RESOLUTIONS[resolution])
+            if not bench_frame(swapper, frame, repeat, samples):
+                skipped += 1
+        results[resolution] = {stage: summarize(*samples[stage]) for stage in STAGES if stage in samples}
+        results[resolution]["images_without_face"] = skipped
+        frame_stats = results[resolution].get("process_frame")
+        if frame_stats:
+            log(f"{resolution}: process_frame {frame_stats['mean_ms']:.1f} ms ({frame_stats['fps']:.1f} fps)")
+
+    return {
+        "meta": {
+            "source": source_path,
+            "images": len(images),
+            "repeat": repeat,
+            "swapper": swapper_kwargs or {},
+            "python": sys.version.split()[0],
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "max_rss_mb": max_rss_mb(),
+        },
+        "results": results,
+    }
+
+
+def max_rss_mb():
+    """Peak resident set size of the process, None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def compare(report, baseline, tolerance=0.10):
+    """List stages whose mean latency grew by more than tolerance over the baseline report."""
+    regressions = []
+    for resolution, stages in report["results"].items():
+        for stage, stats in stages.items():
+            # Stages without samples, like an empty replay stat, have no mean to compare
+            if not isinstance(stats, dict) or "mean_ms" not in stats:
+                continue
+            base = baseline.get("results", {}).get(resolution, {}).get(stage)
+            if not isinstance(base, dict) or base.get("mean_ms", 0) <= 0:
+                continue
+            change = stats["mean_ms"] / base["mean_ms"] - 1.0
+            if change > tolerance:
+                regressions.append({
+                    "resolution": resolution,
+                    "stage": stage,
+                    "baseline_ms": base["mean_ms"],
+                    "current_ms": stats["mean_ms"],
+                    "change": change,
+                })
+    return regressions
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
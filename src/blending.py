@@ -0,0 +1,77 @@
+# Blend backends used to merge the warped face into the destination
+
+import cv2
+import numpy as np
+
+
+def seamless_blend(face, background, mask, center):
+    """Poisson blending with cv2.seamlessClone.
+
+    Best quality, it matches lighting and colour across the whole face, but it solves a
+    Poisson equation over the face box every call and is the slowest backend by far.
+    Use it for stills.
+    """
+    return cv2.seamlessClone(face, background, mask, center, cv2.NORMAL_CLONE)
+
+
+def feather_blend(face, background, mask, center=None, feather_ratio=0.25):
+    """Alpha blend with an edge mask ramped by a distance transform.
+
+    Cheapest backend, one distance transform and one weighted sum. The seam is hidden but
+    colour and lighting are not corrected, so it suits live video where speed matters more.
+    feather_ratio is the width of the ramp relative to the mask's inner radius.
+    """
+    distance = cv2.distanceTransform(mask, cv2.DIST_L2, 3)
+    ramp = max(float(distance.max()) * feather_ratio, 1.0)
+    alpha = np.minimum(distance / ramp, 1.0)[..., None]
+    blended = face * alpha + background * (1.0 - alpha)
+    return blended.astype(np.uint8)
+
+
+def multiband_blend(face, background, mask, center=None, levels=4):
+    """Laplacian-pyramid multi-band blend.
+
+    Low frequencies are mixed over a wide band and fine detail over a narrow one, which hides
+    the seam and softens colour differences at the edge. Costs a few pyramid passes, well
+    below seamlessClone and a bit above the feathered blend.
+    """
+    face_level = face.astype(np.float32)
+    background_level = background.astype(np.float32)
+    mask_level = mask.astype(np.float32) / 255.0
+
+    face_pyramid = [face_level]
+    background_pyramid = [background_level]
+    mask_pyramid = [mask_level]
+    for _ in range(levels):
+        if min(face_level.shape[:2]) < 2:
+            break
+        face_level = cv2.pyrDown(face_level)
+        background_level = cv2.pyrDown(background_level)
+        mask_level = cv2.pyrDown(mask_level)
+        face_pyramid.append(face_level)
+        background_pyramid.append(background_level)
+        mask_pyramid.append(mask_level)
+
+    # Collapse from the coarsest level, blending each Laplacian band with its own mask
+    blended = None
+    for i in range(len(face_pyramid) - 1, -1, -1):
+        alpha = mask_pyramid[i][..., None]
+        if blended is None:
+            face_band = face_pyramid[i]
+            background_band = background_pyramid[i]
+        else:
+            size = (face_pyramid[i].shape[1], face_pyramid[i].shape[0])
+            face_band = face_pyramid[i] - cv2.pyrUp(face_pyramid[i + 1], dstsize=size)
+            background_band = background_pyramid[i] - cv2.pyrUp(background_pyramid[i + 1], dstsize=size)
+            blended = cv2.pyrUp(blended, dstsize=size)
+        band = face_band * alpha + background_band * (1.0 - alpha)
+        blended = band if blended is None else blended + band
+
+    return np.clip(blended, 0, 255).astype(np.uint8)
+
+
+BLENDERS = {
+    "seamless": seamless_blend,
+    "feather": feather_blend,
+    "multiband": multiband_blend,
+}
@@ -0,0 +1,54 @@
+# Reusable frame buffers for the swap hot path
+
+import numpy as np
+
+
+class FrameBuffers:
+    """Buffer arena sized to the stream resolution so steady-state frames make no large allocations.
+
+    Buffers are (re)allocated only when the frame shape changes. Output frames rotate through a
+    small ring, so a returned frame stays valid until output_count more frames are processed.
+    """
+    def __init__(self, output_count=3):
+        self.output_count = output_count
+        self.shape = None
+        self.tile = np.empty((0, 0, 3), np.uint8)
+        self.tile_mask = np.empty((0, 0), np.uint8)
+
+    def ensure(self, shape):
+        """Allocate the frame-sized buffers for frames of this shape if not done already."""
+        if shape == self.shape:
+            return
+        self.shape = shape
+        self.gray = np.empty(shape[:2], np.uint8)
+        # New face canvas and the mask of pixels already claimed by a triangle
+        self.canvas = np.empty(shape, np.uint8)
+        self.coverage = np.empty(shape[:2], np.uint8)
+        self.outputs = [np.empty(shape, np.uint8) for _ in range(self.output_count)]
+        self.output_index = 0
+
+    def face_canvas(self, width, height):
+        """Cleared canvas and coverage views for a face ROI of the given size."""
+        canvas = self.canvas[:height, :width]
+        coverage = self.coverage[:height, :width]
+        canvas.fill(0)
+        coverage.fill(0)
+        return canvas, coverage
+
+    def scratch(self, width, height):
+        """Scratch tile and tile mask views for one triangle, grown on demand."""
+        if self.tile.shape[0] < height or self.tile.shape[1] < width:
+            tile_height = max(height, self.tile.shape[0])
+            tile_width = max(width, self.tile.shape[1])
+            self.tile = np.empty((tile_height, tile_width, 3), np.uint8)
+            self.tile_mask = np.empty((tile_height, tile_width), np.uint8)
+        return self.tile[:height, :width], self.tile_mask[:height, :width]
+
+    def owns(self, frame):
+        """Whether frame is one of the output buffers, which get overwritten a few frames later."""
+        return any(frame is output for output in getattr(self, "outputs", ()))
+
+    def next_output(self):
+        output = self.outputs[self.output_index]
+        self.output_index = (self.output_index + 1) % self.output_count
+        return output
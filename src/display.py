@@ -0,0 +1,63 @@
+# Handing swapped BGR frames to Qt labels without intermediate copies
+
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+
+
+class FrameDisplay:
+    """Fits BGR frames into a fixed label size and wraps them as QImages over the numpy memory.
+
+    The scaled size is worked out once per input resolution and scaled frames go to reusable
+    buffers. A frame that already fits is wrapped as is, unless copy is asked for because its
+    buffer may be reused before the GUI paints it. QImage does not own the numpy memory, so the
+    last wrapped array is kept referenced until the next one replaces it. Frames are only scaled
+    down unless upscale is set.
+    """
+    def __init__(self, width, height, buffer_count=2, upscale=False):
+        self.width = width
+        self.height = height
+        self.upscale = upscale
+        self.buffer_count = buffer_count
+        self.input_shape = None
+        self.size = None
+        self.buffers = []
+        self.buffer_index = 0
+        self._wrapped = None
+
+    def _resize_for(self, shape):
+        self.input_shape = shape
+        height, width = shape[:2]
+        scale = min(self.width / width, self.height / height)
+        if not self.upscale:
+            scale = min(scale, 1.0)
+        self.size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        # Frames that already fit only need buffers when a copy is asked for
+        self.buffers = [np.empty((self.size[1], self.size[0], 3), np.uint8) for _ in range(self.buffer_count)]
+        self.buffer_index = 0
+
+    def fit(self, frame, copy=False):
+        """Return frame scaled down to fit the label, in a display buffer when scaled or copied."""
+        if frame.shape != self.input_shape:
+            self._resize_for(frame.shape)
+        if self.size == (frame.shape[1], frame.shape[0]) and not copy:
+            return frame
+
+        target = self.buffers[self.buffer_index]
+        self.buffer_index = (self.buffer_index + 1) % self.buffer_count
+        if self.size == (frame.shape[1], frame.shape[0]):
+            np.copyto(target, frame)
+        else:
+            cv2.resize(frame, self.size, dst=target, interpolation=cv2.INTER_AREA)
+        return target
+
+    def to_qimage(self, frame):
+        """Wrap a BGR frame from fit() as a QImage without copying it."""
+        frame = np.ascontiguousarray(frame)
+        self._wrapped = frame
+        height, width = frame.shape[:2]
+        return QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+
+    def show(self, label, frame):
+        """Fit frame and paint it on label in one go, for callers on the GUI thread."""
+        label.setPixmap(QPixmap.fromImage(self.to_qimage(self.fit(frame))))
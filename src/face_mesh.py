@@ -2,40 +2,262 @@
 
 import os
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
-import sys
+import threading
 import cv2
-import mediapipe as mp
 import numpy as np
+from src.blending import BLENDERS
+from src.mesh_topology import FACEMESH_TRIANGLES
+from src.telemetry import DISABLED
+
+# Two-stage detection: the face box detector sees the frame at most this wide
+GATE_WIDTH = 640
+# Face crops are downscaled to at most this size, the landmark model works at 192 px anyway
+MAX_CROP_SIZE = 512
+# Crop padding around a face box, relative to its size. Detector boxes are tight, previous landmarks are not
+BOX_PADDING = 0.5
+PREVIOUS_PADDING = 0.25
+
+class LandmarkDetector:
+    """Long-lived FaceMesh graph that can be reused across frames and threads.
+
+    With two_stage FaceMesh only sees padded crops around the faces, one per group of faces whose
+    crops overlap. For video the crops come from the previous frame's landmarks, the cheap face
+    detector only runs when they miss and every gate_interval frames to pick up new faces. Stills
+    always go through the face detector.
+    """
+    def __init__(self, static_image_mode=False, max_num_faces=1, refine_landmarks=True, detect_scale=1.0,
+                 two_stage=False, gate_interval=30):
+        self.static_image_mode = static_image_mode
+        self.max_num_faces = max_num_faces
+        self.refine_landmarks = refine_landmarks
+        # Below 1.0 FaceMesh runs on a downscaled copy, landmarks still come back in full-size pixels.
+        # Single-stage only, two-stage crops are already small
+        self.detect_scale = detect_scale
+        self.two_stage = two_stage
+        self.gate_interval = gate_interval
+        self._face_mesh = None
+        self._face_detection = None
+        # Video only: boxes around the last landmarks found per face and how many frames they have been reused
+        self._last_boxes = []
+        self._box_frames = 0
+        # MediaPipe graphs are not safe to feed from several threads at once
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._face_mesh is None:
+            # MediaPipe takes most of a second to import, so it is only loaded once a graph is needed
+            import mediapipe as mp
+            self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=self.static_image_mode,
+                max_num_faces=self.max_num_faces,
+                refine_landmarks=self.refine_landmarks)
+        return self._face_mesh
+
+    def _open_gate(self):
+        if self._face_detection is None:
+            import mediapipe as mp
+            # Full-range model, it keeps finding small faces in large frames
+            self._face_detection = mp.solutions.face_detection.FaceDetection(model_selection=1)
+        return self._face_detection
+
+    def warmup(self, width=640, height=480):
+        """Build the graph and run one blank frame so the first real call pays inference only."""
+        with self._lock:
+            face_mesh = self._open()
+            face_mesh.process(np.zeros((height, width, 3), np.uint8))
+            if self.two_stage:
+                self._open_gate().process(np.zeros((height, width, 3), np.uint8))
+
+    def reset(self):
+        """Forget the previous frame's face boxes, for a new video stream."""
+        self._last_boxes = []
+        self._box_frames = 0
+
+    def process(self, image):
+        """Run FaceMesh on a BGR image and return the raw MediaPipe results."""
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            return self._open().process(rgb_image)
+
+    def detect_all(self, image, scale=None):
+        """Return the landmark points of every face found, up to max_num_faces, ordered left to right.
+
+        scale overrides detect_scale for this call only.
+        """
+        if self.two_stage:
+            faces = self.detect_two_stage(image)
+            return sorted(faces, key=lambda points: min(x for x, _ in points))
+        if scale is None:
+            scale = self.detect_scale
+        if scale < 1.0:
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            results = self.process(small)
+        else:
+            results = self.process(image)
 
-def get_landmark_points(src_image):
-    with mp.solutions.face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1, # might wanna increase here
-            refine_landmarks=True) as face_mesh:
-        # Convert the BGR image to RGB before processing.
-        results = face_mesh.process(cv2.cvtColor(src_image, cv2.COLOR_BGR2RGB))
-
-        # Print and draw face mesh landmarks on the image.
         if not results.multi_face_landmarks:
-            return None
-        if len(results.multi_face_landmarks) > 1:
-            sys.exit("There are too much face landmarks")
+            return []
+        faces = [landmarks_to_points(face.landmark, image.shape) for face in results.multi_face_landmarks]
+        return sorted(faces, key=lambda points: min(x for x, _ in points))
+
+    def detect_two_stage(self, image):
+        """Landmarks of the faces in image, FaceMesh only running on a crop around them."""
+        if self._last_boxes and self._box_frames < self.gate_interval:
+            self._box_frames += 1
+            faces = self.detect_in_boxes(image, self._last_boxes, PREVIOUS_PADDING)
+            if faces:
+                return faces
+        self._box_frames = 0
+        return self.detect_in_boxes(image, self.find_face_boxes(image), BOX_PADDING)
+
+    def detect_in_boxes(self, image, boxes, padding):
+        """Landmarks of the faces around boxes, FaceMesh running once per group of overlapping crops.
+
+        Far apart faces get a crop each, a single crop spanning them would be downscaled until
+        FaceMesh loses them. For video the box of every face found is kept for the next frame.
+        """
+        faces = []
+        for box in merge_boxes(boxes, padding):
+            faces.extend(self.detect_in_box(image, box, padding))
+        if not self.static_image_mode:
+            self._last_boxes = [points_box(face) for face in faces]
+        return faces
+
+    def find_face_boxes(self, image):
+        """Boxes (x0, y0, x1, y1) of the most confident faces, up to max_num_faces, from the face detector."""
+        scale = min(GATE_WIDTH / image.shape[1], 1.0)
+        # Bilinear is plenty for a box and unlike INTER_AREA its cost does not grow with the source size
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR) if scale < 1.0 else image
+        rgb_image = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            results = self._open_gate().process(rgb_image)
+        if not results.detections:
+            return []
+
+        img_height, img_width = image.shape[:2]
+        detections = sorted(results.detections, key=lambda detection: detection.score[0], reverse=True)
+        boxes = []
+        for detection in detections[:self.max_num_faces]:
+            box = detection.location_data.relative_bounding_box
+            x0, y0 = int(box.xmin * img_width), int(box.ymin * img_height)
+            boxes.append((x0, y0, x0 + int(box.width * img_width), y0 + int(box.height * img_height)))
+        return boxes
+
+    def detect_in_box(self, image, box, padding):
+        """Run FaceMesh on the crop around box, grown by padding times its size on every side.
+
+        Landmarks come back in image coordinates.
+        """
+        x0, y0, x1, y1 = pad_box(box, padding)
+        img_height, img_width = image.shape[:2]
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, img_width), min(y1, img_height)
+        faces = []
+        if x1 > x0 and y1 > y0:
+            crop = image[y0:y1, x0:x1]
+            scale = min(MAX_CROP_SIZE / max(crop.shape[:2]), 1.0)
+            if scale < 1.0:
+                results = self.process(cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+            else:
+                results = self.process(crop)
+            if results.multi_face_landmarks:
+                faces = [landmarks_to_points(face.landmark, crop.shape, (x0, y0))
+                         for face in results.multi_face_landmarks]
+        return faces
+
+    def detect(self, image):
+        """Return the 468 landmark points of the leftmost face in a BGR image, or None."""
+        faces = self.detect_all(image)
+        return faces[0] if faces else None
+
+    def close(self):
+        with self._lock:
+            if self._face_mesh is not None:
+                self._face_mesh.close()
+                self._face_mesh = None
+            if self._face_detection is not None:
+                self._face_detection.close()
+                self._face_detection = None
+
+
+def pad_box(box, padding):
+    """Grow box (x0, y0, x1, y1) by padding times its larger side on every side."""
+    x0, y0, x1, y1 = box
+    pad = int(max(x1 - x0, y1 - y0) * padding)
+    return x0 - pad, y0 - pad, x1 + pad, y1 + pad
+
+
+def merge_boxes(boxes, padding):
+    """Join boxes whose padded crops overlap, so every face is searched in exactly one crop."""
+    merged = list(boxes)
+    joined = True
+    while joined:
+        joined = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = pad_box(merged[i], padding), pad_box(merged[j], padding)
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = (min(merged[i][0], merged[j][0]), min(merged[i][1], merged[j][1]),
+                                 max(merged[i][2], merged[j][2]), max(merged[i][3], merged[j][3]))
+                    del merged[j]
+                    joined = True
+                    break
+            if joined:
+                break
+    return merged
+
+
+def points_box(points):
+    """Bounding box (x0, y0, x1, y1) of a list of (x, y) points."""
+    points = np.array(points)
+    return (*points.min(axis=0).tolist(), *points.max(axis=0).tolist())
+
+
+def landmarks_to_points(face_landmark, shape, offset=(0, 0)):
+    # offset places landmarks found in a crop back into the full image
+    landmark_points = []
+    for i in range(468):
+        y = int(face_landmark[i].y * shape[0]) + offset[1]
+        x = int(face_landmark[i].x * shape[1]) + offset[0]
+        landmark_points.append((x, y))
+    return landmark_points
+
+
+def get_landmark_points(src_image, detector=None):
+    if detector is not None:
+        return detector.detect(src_image)
+
+    # One-off detection, prefer passing a LandmarkDetector in anything called per frame
+    detector = LandmarkDetector(static_image_mode=True)
+    try:
+        return detector.detect(src_image)
+    finally:
+        detector.close()
+
+
+def get_canonical_triangles():
+    """Triangle indexes of the fixed 468-point FaceMesh topology, valid for any detected face."""
+    return FACEMESH_TRIANGLES.tolist()
 
-        src_face_landmark = results.multi_face_landmarks[0].landmark
-        landmark_points = []
-        for i in range(468):
-            y = int(src_face_landmark[i].y * src_image.shape[0])
-            x = int(src_face_landmark[i].x * src_image.shape[1])
-            landmark_points.append((x, y))
-        return landmark_points
 
+def get_coarse_landmarks():
+    """Indexes of the contour and nose landmarks, a sparse subset of the 468 FaceMesh points."""
+    import mediapipe as mp
+    face_mesh = mp.solutions.face_mesh
+    indexes = set()
+    for connections in (face_mesh.FACEMESH_CONTOURS, face_mesh.FACEMESH_NOSE):
+        for connection in connections:
+            indexes.update(connection)
+    return sorted(indexes)
 
-def extract_index_nparray(nparray):
-    index = None
-    for num in nparray[0]:
-        index = num
-        break
-    return index
+
+def get_coarse_triangles(landmark_points):
+    """Delaunay triangles over the coarse landmarks only, about a third of the full topology."""
+    subset = get_coarse_landmarks()
+    points = [tuple(landmark_points[i]) for i in subset]
+    np_points = np.array(points, np.int32)
+    local_triangles = get_triangles(cv2.convexHull(np_points), points, np_points)
+    return [[subset[i] for i in triangle] for triangle in local_triangles]
 
 
 def get_triangles(convexhull, landmarks_points, np_points):
@@ -45,18 +267,16 @@ def get_triangles(convexhull, landmarks_points, np_points):
     triangles = subdiv.getTriangleList()
     triangles = np.array(triangles, dtype=np.int32)
 
+    # Hash lookup from pixel to landmark index, the first landmark wins on duplicates
+    point_index = {}
+    for index, pt in enumerate(map(tuple, np.asarray(np_points).tolist())):
+        point_index.setdefault(pt, index)
+
     indexes_triangles = []
-    for t in triangles:
-        pt1 = (t[0], t[1])
-        pt2 = (t[2], t[3])
-        pt3 = (t[4], t[5])
-
-        index_pt1 = np.where((np_points == pt1).all(axis=1))
-        index_pt1 = extract_index_nparray(index_pt1)
-        index_pt2 = np.where((np_points == pt2).all(axis=1))
-        index_pt2 = extract_index_nparray(index_pt2)
-        index_pt3 = np.where((np_points == pt3).all(axis=1))
-        index_pt3 = extract_index_nparray(index_pt3)
+    for t in triangles.tolist():
+        index_pt1 = point_index.get((t[0], t[1]))
+        index_pt2 = point_index.get((t[2], t[3]))
+        index_pt3 = point_index.get((t[4], t[5]))
 
         if index_pt1 is not None and index_pt2 is not None and index_pt3 is not None:
             triangle = [index_pt1, index_pt2, index_pt3]
@@ -65,112 +285,194 @@ def get_triangles(convexhull, landmarks_points, np_points):
     return indexes_triangles
 
 
-def triangulation(triangle_index, landmark_points, img=None):
-    tr1_pt1 = landmark_points[triangle_index[0]]
-    tr1_pt2 = landmark_points[triangle_index[1]]
-    tr1_pt3 = landmark_points[triangle_index[2]]
-    triangle = np.array([tr1_pt1, tr1_pt2, tr1_pt3], np.int32)
-
-    rect = cv2.boundingRect(triangle)
-    (x, y, w, h) = rect
-
-    cropped_triangle = None
-    if img is not None:
-        cropped_triangle = img[y: y + h, x: x + w]
-
-    cropped_triangle_mask = np.zeros((h, w), np.uint8)
-
-    points = np.array([[tr1_pt1[0] - x, tr1_pt1[1] - y],
-                       [tr1_pt2[0] - x, tr1_pt2[1] - y],
-                       [tr1_pt3[0] - x, tr1_pt3[1] - y]], np.int32)
-
-    cv2.fillConvexPoly(cropped_triangle_mask, points, 255)
-
-    return points, cropped_triangle, cropped_triangle_mask, rect
+class WarpPlan:
+    """Source-side triangle data that only depends on the source face, built once per source."""
+    def __init__(self, indexes_triangles, landmark_points, img, rects=None):
+        self.indexes = np.array(indexes_triangles, np.int32).reshape(-1, 3)
+        triangles = np.array(landmark_points, np.int32)[self.indexes]
+        # Absolute source coordinates and the image they index, used by the dense warp
+        self.image = img
+        self.src_triangles = triangles.astype(np.float32)
+
+        # Rects can come precomputed from the source cache
+        if rects is None:
+            rects = [cv2.boundingRect(t) for t in triangles]
+        self.rects = np.array(rects, np.int32).reshape(-1, 4)
+        self.points = (triangles - self.rects[:, None, :2]).astype(np.float32)
+
+        # Pack every source crop into one contiguous buffer, crops are views into it
+        crops = [img[y: y + h, x: x + w] for (x, y, w, h) in self.rects]
+        self.crop_buffer = np.empty(sum(crop.size for crop in crops), np.uint8)
+        self.crops = []
+        offset = 0
+        for crop in crops:
+            view = self.crop_buffer[offset: offset + crop.size].reshape(crop.shape)
+            view[...] = crop
+            self.crops.append(view)
+            offset += crop.size
+
+    def __len__(self):
+        return len(self.indexes)
+
+    @property
+    def nbytes(self):
+        """Memory held by the plan itself, the source image it points to is not counted."""
+        arrays = (self.indexes, self.src_triangles, self.rects, self.points, self.crop_buffer)
+        return sum(array.nbytes for array in arrays)
+
+
+def warp_triangle_into(canvas, coverage, src_points, src_cropped_triangle, dest_triangle, buffers):
+    """Warp one source triangle onto canvas through the scratch tiles of a FrameBuffers arena.
+
+    Returns False when the destination triangle is degenerate and nothing was drawn.
+    """
+    (x, y, w, h) = cv2.boundingRect(dest_triangle)
+    if w == 0 or h == 0:
+        return False
 
+    points2 = dest_triangle - np.array([x, y], np.int32)
+    warped_triangle, triangle_mask = buffers.scratch(w, h)
+    triangle_mask.fill(0)
+    cv2.fillConvexPoly(triangle_mask, points2, 255)
 
-def warp_triangle(rect, points1, points2, src_cropped_triangle, dest_cropped_triangle_mask):
-    (x, y, w, h) = rect
-    matrix = cv2.getAffineTransform(np.float32(points1), np.float32(points2))
-    warped_triangle = cv2.warpAffine(src_cropped_triangle, matrix, (w, h))
-    warped_triangle = cv2.bitwise_and(warped_triangle, warped_triangle, mask=dest_cropped_triangle_mask)
-    return warped_triangle
+    matrix = cv2.getAffineTransform(src_points, points2.astype(np.float32))
+    cv2.warpAffine(src_cropped_triangle, matrix, (w, h), dst=warped_triangle)
+    composite_triangle(canvas, coverage, (x, y, w, h), warped_triangle, triangle_mask)
+    return True
 
 
-def add_piece_of_new_face(new_face, rect, warped_triangle):
+def composite_triangle(canvas, coverage, rect, warped_triangle, triangle_mask):
+    """Copy a warped triangle into canvas in uint8, pixels already claimed by an earlier triangle are kept."""
     (x, y, w, h) = rect
-    
-    if w == 0 or h == 0:
-        if not hasattr(add_piece_of_new_face, 'warning_shown'):
-            print("Warning: Invalid face region dimensions.")
-            add_piece_of_new_face.warning_shown = True
+    img_height, img_width = coverage.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, img_width), min(y + h, img_height)
+    if x1 <= x0 or y1 <= y0:
         return
-    
-    new_face_rect_area = new_face[y: y + h, x: x + w]
-    
-    if new_face_rect_area is None or new_face_rect_area.size == 0:
-        if not hasattr(add_piece_of_new_face, 'warning_shown'):
-            print("Warning: Empty face region.")
-            add_piece_of_new_face.warning_shown = True
-        return
-
-    # Convert to float32 for precision if necessary
-    new_face_rect_area = new_face_rect_area.astype('float32')
-    warped_triangle = warped_triangle.astype('float32')
-
-    new_face_rect_area_gray = cv2.cvtColor(new_face_rect_area, cv2.COLOR_BGR2GRAY)
-    _, mask_triangles_designed = cv2.threshold(new_face_rect_area_gray, 1, 255, cv2.THRESH_BINARY_INV)
-
-    # Ensure mask and triangle have the same size
-    if warped_triangle.shape[:2] != mask_triangles_designed.shape[:2]:
-        mask_triangles_designed = cv2.resize(mask_triangles_designed, (warped_triangle.shape[1], warped_triangle.shape[0]))
-
-    # Apply the mask
-    warped_triangle = cv2.bitwise_and(warped_triangle, warped_triangle, mask=mask_triangles_designed.astype('uint8'))
-
-    # Ensure both have the same size
-    if warped_triangle.shape[:2] != new_face_rect_area.shape[:2]:
-        warped_triangle = cv2.resize(warped_triangle, (new_face_rect_area.shape[1], new_face_rect_area.shape[0]))
-
-    # Ensure both have the same number of channels
-    if len(warped_triangle.shape) == 2:  # If warped_triangle is grayscale
-        warped_triangle = cv2.cvtColor(warped_triangle, cv2.COLOR_GRAY2BGR)
-
-    # Add the warped triangle to the face region
-    new_face_rect_area = cv2.add(new_face_rect_area, warped_triangle)
-
-    # Convert back to uint8 if needed
-    new_face[y: y + h, x: x + w] = cv2.convertScaleAbs(new_face_rect_area)
-
-def swap_new_face(dest_image, dest_image_gray, dest_convexHull, new_face):
-    face_mask = np.zeros_like(dest_image_gray)
-    head_mask = cv2.fillConvexPoly(face_mask, dest_convexHull, 255)
-    face_mask = cv2.bitwise_not(head_mask)
 
-    head_without_face = cv2.bitwise_and(dest_image, dest_image, mask=face_mask)
-    result = cv2.add(head_without_face, new_face)
+    tile = warped_triangle[y0 - y: y1 - y, x0 - x: x1 - x]
+    tile_mask = triangle_mask[y0 - y: y1 - y, x0 - x: x1 - x]
+    covered = coverage[y0:y1, x0:x1]
+
+    cv2.subtract(tile_mask, covered, dst=tile_mask)
+    cv2.copyTo(tile, tile_mask, canvas[y0:y1, x0:x1])
+    cv2.bitwise_or(covered, tile_mask, dst=covered)
+
+
+def solve_affines(src_triangles, dest_triangles):
+    """Solve every dest -> src triangle affine at once, returns (T, 2, 3) matrices and a validity mask."""
+    count = len(dest_triangles)
+    dest_h = np.ones((count, 3, 3), np.float64)
+    dest_h[:, :, :2] = dest_triangles
+
+    # Collapsed triangles have no inverse, solve them against identity and drop them later
+    valid = np.abs(np.linalg.det(dest_h)) > 1e-6
+    dest_h[~valid] = np.eye(3)
+
+    matrices = np.linalg.solve(dest_h, src_triangles.astype(np.float64))
+    return matrices.transpose(0, 2, 1).astype(np.float32), valid
+
+
+def dense_warp(plan, dest_np_points, new_face, telemetry=DISABLED, origin=(0, 0)):
+    """Warp every triangle of the plan onto new_face with a single remap over the destination face box.
+
+    new_face may be a window of a larger canvas whose top-left corner sits at origin in the
+    coordinates of dest_np_points. Affines are solved in those coordinates either way, so every
+    window of a canvas comes out exactly like the matching part of one whole-canvas call.
+    """
+    dest_triangles = np.asarray(dest_np_points, np.int32)[plan.indexes]
+    matrices, valid = solve_affines(plan.src_triangles, dest_triangles)
+    telemetry.count("triangles_skipped", len(valid) - int(np.count_nonzero(valid)))
+
+    origin_x, origin_y = origin
+    img_height, img_width = new_face.shape[:2]
+    (x, y, w, h) = cv2.boundingRect(dest_triangles.reshape(-1, 2))
+    x0, y0 = max(x, origin_x), max(y, origin_y)
+    x1, y1 = min(x + w, origin_x + img_width), min(y + h, origin_y + img_height)
+    if x1 <= x0 or y1 <= y0:
+        return new_face
+
+    # Triangle-ID map, 0 is background. Drawn back to front so the first triangle wins like the loop path
+    triangle_ids = np.zeros((y1 - y0, x1 - x0), np.int32)
+    local_triangles = dest_triangles - np.array([x0, y0], np.int32)
+    for i in np.flatnonzero(valid)[::-1]:
+        (tx, ty, tw, th) = cv2.boundingRect(dest_triangles[i])
+        if tx >= x0 and ty >= y0 and tx + tw <= x1 and ty + th <= y1:
+            cv2.fillConvexPoly(triangle_ids, local_triangles[i], int(i) + 1)
+            continue
+        # fillConvexPoly rasterizes clipped polygons differently, so triangles crossing the box
+        # edge are drawn whole in their own box and only the overlapping part is copied
+        cx0, cy0 = max(tx, x0), max(ty, y0)
+        cx1, cy1 = min(tx + tw, x1), min(ty + th, y1)
+        if cx1 <= cx0 or cy1 <= cy0:
+            continue
+        mask = np.zeros((th, tw), np.uint8)
+        cv2.fillConvexPoly(mask, dest_triangles[i] - np.array([tx, ty], np.int32), 1)
+        inside = mask[cy0 - ty:cy1 - ty, cx0 - tx:cx1 - tx] > 0
+        triangle_ids[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0][inside] = int(i) + 1
+
+    # Row 0 sends background pixels far outside the source so remap leaves them black
+    coefficients = np.zeros((len(matrices) + 1, 6), np.float32)
+    coefficients[0, 2] = coefficients[0, 5] = -1e5
+    coefficients[1:] = matrices.reshape(-1, 6)
+    per_pixel = coefficients[triangle_ids]
+
+    grid_y, grid_x = np.mgrid[y0:y1, x0:x1].astype(np.float32)
+    map_x = per_pixel[..., 0] * grid_x + per_pixel[..., 1] * grid_y + per_pixel[..., 2]
+    map_y = per_pixel[..., 3] * grid_x + per_pixel[..., 4] * grid_y + per_pixel[..., 5]
+
+    warped = cv2.remap(plan.image, map_x, map_y, cv2.INTER_LINEAR,
+                       borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+    # Only write covered pixels so faces sharing the canvas do not erase each other
+    cv2.copyTo(warped, (triangle_ids > 0).view(np.uint8),
+               new_face[y0 - origin_y:y1 - origin_y, x0 - origin_x:x1 - origin_x])
+    return new_face
+
+
+def get_face_roi(convexhull, shape, padding=16):
+    """Padded bounding box (x0, y0, x1, y1) of a face hull, clipped to an image of the given shape."""
+    (x, y, w, h) = cv2.boundingRect(convexhull)
+    img_height, img_width = shape[:2]
+    x0, y0 = max(x - padding, 0), max(y - padding, 0)
+    x1, y1 = min(x + w + padding, img_width), min(y + h + padding, img_height)
+    return x0, y0, x1, y1
+
+
+def swap_new_face(dest_image, dest_image_gray, dest_convexHull, new_face, blend="seamless", telemetry=DISABLED):
+    # A list of hulls blends several faces in a single pass
+    hulls = dest_convexHull if isinstance(dest_convexHull, (list, tuple)) else [dest_convexHull]
+    with telemetry.stage("composite"):
+        face_mask = np.zeros_like(dest_image_gray)
+        for hull in hulls:
+            cv2.fillConvexPoly(face_mask, hull, 255)
+        head_mask = face_mask
+        face_mask = cv2.bitwise_not(head_mask)
+
+        head_without_face = cv2.bitwise_and(dest_image, dest_image, mask=face_mask)
+        result = cv2.add(head_without_face, new_face)
 
     # Calculate bounding rect for destination convex hull
-    (x, y, w, h) = cv2.boundingRect(dest_convexHull)
+    (x, y, w, h) = cv2.boundingRect(np.concatenate(hulls))
     
     # Ensure bounding box fits within the image dimensions
     img_height, img_width = dest_image.shape[:2]
     
     # Ensure the coordinates are within image boundaries
     if x < 0 or y < 0 or x + w > img_width or y + h > img_height:
-        print(f"Warning: Invalid bounding box (x, y, w, h): ({x}, {y}, {w}, {h})")
+        telemetry.warn("invalid_bbox", f"Warning: Invalid bounding box (x, y, w, h): ({x}, {y}, {w}, {h})")
         return dest_image  # Return the original image without any changes
 
     center_face = (int((x + x + w) / 2), int((y + y + h) / 2))
 
     # Ensure center face is within bounds
     if center_face[0] < 0 or center_face[1] < 0 or center_face[0] >= img_width or center_face[1] >= img_height:
-        print(f"Warning: Invalid center face position: {center_face}")
+        telemetry.warn("invalid_center", f"Warning: Invalid center face position: {center_face}")
         return dest_image
 
-    # Seamless clone only if everything is valid
+    # Blend only if everything is valid
     try:
-        return cv2.seamlessClone(result, dest_image, head_mask, center_face, cv2.NORMAL_CLONE)
+        with telemetry.stage("blend"):
+            return BLENDERS[blend](result, dest_image, head_mask, center_face)
     except cv2.error as e:
-        print(f"Error during seamless cloning: {str(e)}")
+        telemetry.warn("blend_errors", f"Error during {blend} blending: {str(e)}")
         return dest_image
@@ -1,50 +1,187 @@
 # works
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 from src.face_mesh import (
+    LandmarkDetector,
+    dense_warp,
+    get_canonical_triangles,
+    get_face_roi,
     get_landmark_points, 
     get_triangles, 
-    triangulation, 
     swap_new_face, 
-    add_piece_of_new_face, 
-    warp_triangle
+    warp_triangle_into
 )
+from src.blending import BLENDERS
+from src.buffers import FrameBuffers
+from src.frame_source import CameraSource
+from src.source_face import SourceFace
+from src.telemetry import Telemetry
+from src.temporal import LandmarkSmoother, WarpReuse
+from src.tracking import LandmarkTracker
+
+# "triangles" warps one triangle at a time, "dense" does a single remap over the whole face
+WARP_MODES = ("triangles", "dense")
+# "canonical" uses the fixed FaceMesh triangle table, "delaunay" triangulates each source
+TOPOLOGIES = ("canonical", "delaunay")
+# "coarse" warps a sparse Delaunay mesh over the face contours, cheaper and blockier
+TRIANGLE_DENSITIES = ("full", "coarse")
+# Bump when the cached source analysis changes shape or meaning
+SOURCE_CACHE_VERSION = 1
+# Face boxes are snapped outwards to this grid while reusing warps, so small moves keep the same box
+REUSE_GRID = 16
+# Stills are searched for faces at most this wide, the landmarks are scaled back to full size
+STILL_DETECT_WIDTH = 1280
+# Largest warp band of a still in pixels, keeps the dense warp temporaries small on 24+ MP images
+STILL_TILE_PIXELS = 1 << 20
+# Progress steps reported by swap_still
+STILL_STEPS = 3
 
 class FaceSwapper:
     """Class to handle face swapping logic for both images and video."""
-    def __init__(self, src_image_path=None, width=640, height=480):
+    def __init__(self, src_image_path=None, width=640, height=480, warp_mode="triangles",
+                 topology="canonical", tracking=False, keyframe_interval=5, min_tracking_confidence=0.8,
+                 blend="seamless", source_cache=None, max_faces=1, telemetry=None, smoothing=False,
+                 reuse=False, two_stage=False):
         # Constants
         self.WIDTH = width
         self.HEIGHT = height
+
+        if warp_mode not in WARP_MODES:
+            raise ValueError(f"Unknown warp mode: {warp_mode}")
+        self.warp_mode = warp_mode
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology: {topology}")
+        self.topology = topology
+        # Default blend backend, process_frame can override it per call
+        self.set_blend(blend)
         
-        # Initialize video capture
-        self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        self.cap.set(3, self.WIDTH)
-        self.cap.set(4, self.HEIGHT)
+        # Frames for streaming come from a FrameSource, opened only by start_video
+        self.source = None
+
+        # Long-lived landmark detectors: stills get a fresh detection every call,
+        # video keeps MediaPipe's tracking state between consecutive frames.
+        # two_stage runs FaceMesh on face crops only, worth it on large frames
+        self.image_detector = LandmarkDetector(static_image_mode=True, max_num_faces=max_faces, two_stage=two_stage)
+        self.video_detector = LandmarkDetector(static_image_mode=False, max_num_faces=max_faces, two_stage=two_stage)
+
+        # Optional optical-flow tracking, full detection only runs on keyframes
+        self.keyframe_interval = keyframe_interval
+        self.min_tracking_confidence = min_tracking_confidence
+        self.tracker = None
+        self.set_tracking(tracking)
+
+        # Quality knobs the adaptive controller turns down under load
+        self.triangle_density = "full"
+        self.post_filter = True
+
+        # Video only: One Euro smoothing of the destination landmarks, and skipping the warp and
+        # blend work for faces that did not move since the previous frame
+        self.smoother = LandmarkSmoother() if smoothing else None
+        self.reuse = WarpReuse() if reuse else None
+        
+        # Optional SourceCache so known source faces skip analysis
+        self.source_cache = source_cache
+
+        # Reusable per-stream buffers for the hot path
+        self.buffers = FrameBuffers()
+
+        # Stage timers and counters, disabled until someone wants to look at them
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
         
-        # Load source image
-        self.src_image = None
+        # The active SourceFace, replaced as a whole so every frame sees one consistent source
+        self.source_face = None
+        self.last_face_found = False
+        self.last_faces = []
         if src_image_path:
-            self.set_src_image(self.src_image)
+            self.set_src_image_path(src_image_path)
         
     def set_src_image(self, image):
         """Set and process the source image for face swapping."""
+        self.use_source(self.analyze_source(image))
+
+    def use_source(self, source_face):
+        """Make an analyzed SourceFace the active source, the next frame picks it up."""
+        self.source_face = source_face
+
+    def analyze_source(self, image, name=None):
+        """Analyze a source image into a SourceFace, the active source is left alone."""
         if image is None:
             raise ValueError("Cannot set a None image as the source.")
-        self.src_image = image
-        self.src_image_gray = cv2.cvtColor(self.src_image, cv2.COLOR_BGR2GRAY)
-        self.src_mask = np.zeros_like(self.src_image_gray)
-        self.src_landmark_points = get_landmark_points(self.src_image)
-        if not self.src_landmark_points:
-            raise ValueError("No facial landmarks detected in the source image.")
-        self.src_np_points = np.array(self.src_landmark_points)
-        self.src_convexHull = cv2.convexHull(self.src_np_points)
-        cv2.fillConvexPoly(self.src_mask, self.src_convexHull, 255)
-        self.indexes_triangles = get_triangles(
-            convexhull=self.src_convexHull,
-            landmarks_points=self.src_landmark_points,
-            np_points=self.src_np_points
+
+        cache_key = None
+        cached = None
+        if self.source_cache is not None:
+            cache_key = self.source_cache.key(image, self.source_settings())
+            cached = self.source_cache.load(cache_key, names=("landmarks", "hull", "triangles", "rects"))
+
+        if cached is not None:
+            landmark_points = [tuple(point) for point in cached["landmarks"].tolist()]
+            convexhull = cached["hull"]
+            indexes_triangles = cached["triangles"].tolist()
+            plan_rects = cached["rects"]
+        else:
+            landmark_points = get_landmark_points(image, self.image_detector)
+            if not landmark_points:
+                raise ValueError("No facial landmarks detected in the source image.")
+            convexhull = cv2.convexHull(np.array(landmark_points))
+            indexes_triangles = self.get_source_triangles(landmark_points, convexhull)
+            plan_rects = None
+
+        source_face = SourceFace(image, landmark_points, convexhull, indexes_triangles, rects=plan_rects, name=name)
+
+        if cache_key is not None and cached is None:
+            self.source_cache.store(
+                cache_key,
+                landmarks=np.array(landmark_points, np.int32),
+                hull=convexhull,
+                triangles=source_face.warp_plan.indexes,
+                rects=source_face.warp_plan.rects
+            )
+        return source_face
+
+    # The active source's data, kept as attributes for existing callers
+    @property
+    def src_image(self):
+        return self.source_face.image if self.source_face is not None else None
+
+    @property
+    def src_landmark_points(self):
+        return self.source_face.landmark_points
+
+    @property
+    def src_convexHull(self):
+        return self.source_face.convexhull
+
+    @property
+    def indexes_triangles(self):
+        return self.source_face.indexes_triangles
+
+    @property
+    def warp_plan(self):
+        return self.source_face.warp_plan
+
+    def source_settings(self):
+        """Settings that change the analysis of a source image, part of the cache key."""
+        return {
+            "version": SOURCE_CACHE_VERSION,
+            "topology": self.topology,
+            "refine_landmarks": self.image_detector.refine_landmarks,
+            # Both change which landmarks the detector returns for the same image
+            "two_stage": self.image_detector.two_stage,
+            "max_num_faces": self.image_detector.max_num_faces,
+        }
+
+    def get_source_triangles(self, landmark_points, convexhull):
+        """Triangle indexes for a source face, Delaunay is the fallback for non-FaceMesh layouts."""
+        if self.topology == "canonical" and len(landmark_points) == 468:
+            return get_canonical_triangles()
+        return get_triangles(
+            convexhull=convexhull,
+            landmarks_points=landmark_points,
+            np_points=np.array(landmark_points)
         )
 
     def set_src_image_path(self, src_image_path):
@@ -54,59 +191,368 @@ class FaceSwapper:
             raise ValueError(f"Could not load source image: {src_image_path}")
         self.set_src_image(image)
 
-    def process_frame(self, dest_image):
-        """Process a single frame/image for face swapping."""
-        if self.src_image is None:
-            raise ValueError("Source image not set")
-            
-        dest_image_gray = cv2.cvtColor(dest_image, cv2.COLOR_BGR2GRAY)        
-        # Get destination landmark points
-        dest_landmark_points = get_landmark_points(dest_image)
-
-        # If no face detected, return original image
-        if dest_landmark_points is None:
-            print("No face detected in the destination image")
-            return cv2.cvtColor(dest_image, cv2.COLOR_BGR2RGB)
-        
-        dest_np_points = np.array(dest_landmark_points)
-        dest_convexHull = cv2.convexHull(dest_np_points)
-        
-        height, width, channels = dest_image.shape
-        new_face = np.zeros((height, width, channels), np.uint8)
-        
-        # Triangulation and warping
-        for triangle_index in self.indexes_triangles:
-            points, src_cropped_triangle, cropped_triangle_mask, _ = triangulation(
-                triangle_index=triangle_index,
-                landmark_points=self.src_landmark_points,
-                img=self.src_image
+    def set_blend(self, blend):
+        """Select the blend backend, one of src.blending.BLENDERS."""
+        if blend not in BLENDERS:
+            raise ValueError(f"Unknown blend backend: {blend}")
+        self.blend = blend
+
+    def set_triangle_density(self, density):
+        """Warp with the full topology or the coarse one, see TRIANGLE_DENSITIES."""
+        if density not in TRIANGLE_DENSITIES:
+            raise ValueError(f"Unknown triangle density: {density}")
+        self.triangle_density = density
+
+    def current_plan(self):
+        """Warp plan of the active source for the current triangle density."""
+        return self.source_face.plan(self.triangle_density)
+
+    def set_tracking(self, enabled, keyframe_interval=None):
+        """Turn landmark tracking between keyframes on or off, optionally changing the keyframe interval."""
+        if keyframe_interval is not None:
+            self.keyframe_interval = keyframe_interval
+        if not enabled:
+            self.tracker = None
+        elif self.tracker is None:
+            self.tracker = LandmarkTracker(
+                self.video_detector,
+                keyframe_interval=self.keyframe_interval,
+                min_confidence=self.min_tracking_confidence
             )
+        else:
+            self.tracker.keyframe_interval = self.keyframe_interval
+
+    def warmup(self, progress=None):
+        """Initialize both landmark detectors ahead of the first swap.
+
+        progress, if given, is called as progress(step, total, label) before each step.
+        """
+        steps = (
+            ("Building video landmark model", self.video_detector),
+            ("Building image landmark model", self.image_detector),
+        )
+        for step, (label, detector) in enumerate(steps):
+            if progress is not None:
+                progress(step, len(steps), label)
+            detector.warmup(self.WIDTH, self.HEIGHT)
+
+    def process_frame(self, dest_image, detector=None, blend=None, faces=None, in_place=False):
+        """Process a single frame/image for face swapping.
+
+        The returned frame is BGR like the input. It lives in the buffer arena and stays valid for
+        the next few frames only, copy it if it has to be kept longer. When no face was swapped
+        dest_image itself is returned. With in_place the face box is pasted straight into
+        dest_image, which is returned, saving a full-frame copy when the caller owns the frame.
+        """
+        self.telemetry.begin_frame()
+        try:
+            output, _ = self.process_faces(dest_image, faces=faces, detector=detector, blend=blend,
+                                           in_place=in_place)
+        finally:
+            self.telemetry.end_frame()
+        return output
+
+    def process_faces(self, dest_image, faces=None, detector=None, blend=None, in_place=False):
+        """Swap the source onto every detected face, or the selected face indexes, in one pass.
+
+        Returns the output frame and one result dict per detected face (landmarks, hull, bbox
+        and whether it was swapped), faces being ordered left to right.
+        """
+        # Read once, a source switched from another thread applies from the next frame
+        source_face = self.source_face
+        if source_face is None:
+            raise ValueError("Source image not set")
+        if blend is None:
+            blend = self.blend
+        elif blend not in BLENDERS:
+            raise ValueError(f"Unknown blend backend: {blend}")
             
-            points2, _, dest_cropped_triangle_mask, rect = triangulation(
-                triangle_index=triangle_index,
-                landmark_points=dest_landmark_points
+        telemetry = self.telemetry
+        buffers = self.buffers
+        buffers.ensure(dest_image.shape)
+        with telemetry.stage("detect"):
+            dest_image_gray = cv2.cvtColor(dest_image, cv2.COLOR_BGR2GRAY, dst=buffers.gray)
+            # Get destination landmark points, tracked between keyframes for video when enabled
+            tracker = self.tracker
+            if detector is None and tracker is not None:
+                dest_faces = tracker.track(dest_image, dest_image_gray)
+            else:
+                dest_faces = (detector or self.video_detector).detect_all(dest_image)
+            if detector is None and self.smoother is not None:
+                dest_faces = self.smoother.smooth(dest_faces)
+        face_results, swapped = self.select_faces(dest_faces, dest_image.shape, faces)
+
+        # If no face to swap, return original image
+        if not swapped:
+            return dest_image, face_results
+        img_height, img_width = dest_image.shape[:2]
+
+        # Everything below works on one padded crop around the faces, so cost follows face size
+        x0, y0, x1, y1 = get_face_roi(np.concatenate([hull for _, hull in swapped]), dest_image.shape)
+        reuse = self.reuse if detector is None else None
+        if reuse is not None:
+            x0, y0 = x0 - x0 % REUSE_GRID, y0 - y0 % REUSE_GRID
+            x1 = min(x1 + (-x1) % REUSE_GRID, img_width)
+            y1 = min(y1 + (-y1) % REUSE_GRID, img_height)
+        offset = np.array([x0, y0], np.int32)
+        roi = dest_image[y0:y1, x0:x1]
+        new_face, coverage = buffers.face_canvas(x1 - x0, y1 - y0)
+        roi_points = [np_points - offset for np_points, _ in swapped]
+        roi_hulls = [hull - offset for _, hull in swapped]
+
+        density = self.triangle_density
+        plan = source_face.plan(density)
+        mode, moved = "full", None
+        if reuse is not None:
+            key = (dest_image.shape, (x0, y0, x1, y1), source_face.serial, density, blend, self.warp_mode)
+            mode, moved = reuse.classify(key, roi_points, plan.indexes, incremental=self.warp_mode == "triangles")
+
+        if mode == "static":
+            # Nothing moved, paste the previous blend result over this frame's face box
+            telemetry.count("frames_reused")
+            result = roi.copy()
+            cv2.copyTo(reuse.blended, reuse.mask, result)
+            reuse.store(key, roi_points, None, None, None, None, reused=True)
+        else:
+            # Every face warps into the shared canvas, then a single blend pass merges them all
+            with telemetry.stage("warp"):
+                if mode == "incremental":
+                    np.copyto(new_face, reuse.canvas)
+                    np.copyto(coverage, reuse.coverage)
+                    # Points within the threshold keep their old position, so the canvas always
+                    # matches the stored points exactly and small drifts cannot pile up
+                    roi_points = [np.where(face_moved[:, None], points, old_points)
+                                  for points, old_points, face_moved in zip(roi_points, reuse.points, moved)]
+                    for points, old_points, face_moved in zip(roi_points, reuse.points, moved):
+                        self.rewarp_triangles(points, old_points, face_moved, new_face, coverage, plan=plan)
+                else:
+                    for points in roi_points:
+                        if self.warp_mode == "dense":
+                            dense_warp(plan, points, new_face, telemetry=telemetry)
+                        else:
+                            self.warp_triangles(points, new_face, coverage, plan=plan)
+
+            result = swap_new_face(
+                dest_image=roi, dest_image_gray=dest_image_gray[y0:y1, x0:x1],
+                dest_convexHull=roi_hulls, new_face=new_face, blend=blend,
+                telemetry=telemetry
             )
-            
-            warped_triangle = warp_triangle(
-                rect=rect, points1=points, points2=points2,
-                src_cropped_triangle=src_cropped_triangle,
-                dest_cropped_triangle_mask=dest_cropped_triangle_mask
+            if reuse is not None:
+                mask = np.zeros(roi.shape[:2], np.uint8)
+                for hull in roi_hulls:
+                    cv2.fillConvexPoly(mask, hull, 255)
+                reuse.store(key, roi_points, new_face, coverage, result, mask)
+
+        with telemetry.stage("post"):
+            if self.post_filter:
+                result = cv2.medianBlur(result, 3)
+            # Frames stay BGR all the way to the display, only the face box differs from the input
+            if in_place:
+                output = dest_image
+            else:
+                output = buffers.next_output()
+                np.copyto(output, dest_image)
+            output[y0:y1, x0:x1] = result
+        return output, face_results
+
+    def select_faces(self, dest_faces, shape, faces=None):
+        """Build the per-face results for detected landmarks and pick the faces to swap.
+
+        Returns the result dicts and (points, hull) of every selected face that fits in the image.
+        """
+        telemetry = self.telemetry
+        telemetry.count("faces", len(dest_faces))
+        img_height, img_width = shape[:2]
+        face_results = []
+        swapped = []
+        with telemetry.stage("triangulate"):
+            for index, landmark_points in enumerate(dest_faces):
+                np_points = np.array(landmark_points, np.int32)
+                hull = cv2.convexHull(np_points)
+                (x, y, w, h) = cv2.boundingRect(hull)
+                selected = faces is None or index in faces
+                inside = x >= 0 and y >= 0 and x + w <= img_width and y + h <= img_height
+                if selected and not inside:
+                    telemetry.warn("invalid_bbox", f"Warning: Invalid bounding box (x, y, w, h): ({x}, {y}, {w}, {h})")
+                face_results.append({
+                    "landmarks": landmark_points,
+                    "hull": hull,
+                    "bbox": (x, y, w, h),
+                    "swapped": selected and inside,
+                })
+                if selected and inside:
+                    swapped.append((np_points, hull))
+        self.last_faces = face_results
+        self.last_face_found = bool(face_results)
+        if not face_results:
+            telemetry.warn("no_face", "No face detected in the destination image")
+        return face_results, swapped
+
+    def swap_still(self, dest_image, blend=None, faces=None, workers=None, detect_width=STILL_DETECT_WIDTH,
+                   progress=None):
+        """Swap the source onto a still image at its full resolution.
+
+        Landmarks are found on a copy at most detect_width wide, or on face crops with two-stage
+        detection, and scaled back. The warp runs at native resolution split into bands over
+        workers threads (every core by default). Only the padded face box is worked on, so memory
+        follows the face size plus one copy of the image.
+        Returns a new BGR image, or dest_image itself when no face was swapped.
+
+        progress, if given, is called as progress(step, total, label) before each step. It may raise
+        to abandon the swap, the exception is passed on to the caller.
+        """
+        source_face = self.source_face
+        if source_face is None:
+            raise ValueError("Source image not set")
+        if blend is None:
+            blend = self.blend
+        elif blend not in BLENDERS:
+            raise ValueError(f"Unknown blend backend: {blend}")
+
+        telemetry = self.telemetry
+        telemetry.begin_frame()
+        try:
+            if progress is not None:
+                progress(0, STILL_STEPS, "Finding faces")
+            with telemetry.stage("detect"):
+                scale = min(detect_width / dest_image.shape[1], 1.0)
+                dest_faces = self.image_detector.detect_all(dest_image, scale=scale)
+            face_results, swapped = self.select_faces(dest_faces, dest_image.shape, faces)
+            if not swapped:
+                return dest_image
+
+            x0, y0, x1, y1 = get_face_roi(np.concatenate([hull for _, hull in swapped]), dest_image.shape)
+            offset = np.array([x0, y0], np.int32)
+            roi = dest_image[y0:y1, x0:x1]
+            new_face = np.zeros_like(roi)
+            coverage = np.zeros(roi.shape[:2], np.uint8)
+            plan = source_face.plan(self.triangle_density)
+            if progress is not None:
+                progress(1, STILL_STEPS, "Warping")
+            with telemetry.stage("warp"):
+                for np_points, _ in swapped:
+                    self.warp_tiled(np_points - offset, new_face, coverage, plan=plan, workers=workers)
+
+            if progress is not None:
+                progress(2, STILL_STEPS, "Blending")
+            result = swap_new_face(
+                dest_image=roi, dest_image_gray=cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY),
+                dest_convexHull=[hull - offset for _, hull in swapped], new_face=new_face,
+                blend=blend, telemetry=telemetry
             )
-            add_piece_of_new_face(
-                new_face=new_face, rect=rect, warped_triangle=warped_triangle
+            with telemetry.stage("post"):
+                if self.post_filter:
+                    result = cv2.medianBlur(result, 3)
+                output = dest_image.copy()
+                output[y0:y1, x0:x1] = result
+            return output
+        finally:
+            telemetry.end_frame()
+
+    def warp_tiled(self, dest_np_points, new_face, coverage, plan=None, workers=None):
+        """Warp onto a large canvas in horizontal bands, each band drawn by its own thread.
+
+        Bands never overlap and each one draws its triangles in plan order, clipped to the band.
+        The dense warp solves its affines in canvas coordinates for every band, so in both warp
+        modes the canvas ends up exactly as a single-threaded warp would leave it.
+        """
+        if plan is None:
+            plan = self.current_plan()
+        workers = workers or os.cpu_count() or 1
+        height, width = coverage.shape
+        # A couple of bands per worker evens out the load, each small enough to bound the temporaries
+        band_height = -(-height // (2 * workers))
+        band_height = max(64, min(band_height, STILL_TILE_PIXELS // max(width, 1)))
+
+        dest_triangles = dest_np_points[plan.indexes]
+        top = dest_triangles[:, :, 1].min(axis=1)
+        bottom = dest_triangles[:, :, 1].max(axis=1)
+        bands = []
+        for band_y in range(0, height, band_height):
+            band_end = min(band_y + band_height, height)
+            indexes = np.flatnonzero((bottom >= band_y) & (top < band_end))
+            if len(indexes):
+                bands.append((band_y, band_end, indexes))
+
+        def warp_band(band):
+            band_y, band_end, indexes = band
+            shift = np.array([0, band_y], np.int32)
+            band_canvas = new_face[band_y:band_end]
+            if self.warp_mode == "dense":
+                dense_warp(plan, dest_np_points, band_canvas, origin=(0, band_y))
+                return 0
+            band_coverage = coverage[band_y:band_end]
+            # Scratch tiles are per band, the arena of the swapper belongs to the video path
+            buffers = FrameBuffers()
+            skipped = 0
+            for i in indexes:
+                if not warp_triangle_into(
+                    canvas=band_canvas, coverage=band_coverage,
+                    src_points=plan.points[i], src_cropped_triangle=plan.crops[i],
+                    dest_triangle=dest_triangles[i] - shift, buffers=buffers
+                ):
+                    # A flat triangle can touch several bands, count it once
+                    skipped += int(top[i] >= band_y or band_y == 0)
+            return skipped
+
+        if workers == 1 or len(bands) == 1:
+            skipped = sum(map(warp_band, bands))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                skipped = sum(pool.map(warp_band, bands))
+        self.telemetry.count("triangles_skipped", skipped)
+
+    def warp_triangles(self, dest_np_points, new_face, coverage, plan=None):
+        """Warp the source face onto new_face one triangle at a time."""
+        # Source side comes precomputed from the warp plan, scratch tiles from the buffer arena
+        if plan is None:
+            plan = self.current_plan()
+        dest_triangles = dest_np_points[plan.indexes]
+        skipped = 0
+        for points, src_cropped_triangle, dest_triangle in zip(plan.points, plan.crops, dest_triangles):
+            if not warp_triangle_into(
+                canvas=new_face, coverage=coverage,
+                src_points=points, src_cropped_triangle=src_cropped_triangle,
+                dest_triangle=dest_triangle, buffers=self.buffers
+            ):
+                skipped += 1
+        self.telemetry.count("triangles_skipped", skipped)
+
+    def rewarp_triangles(self, dest_np_points, old_np_points, moved, new_face, coverage, plan=None):
+        """Update a canvas warped for old_np_points to dest_np_points, redrawing only the affected triangles."""
+        if plan is None:
+            plan = self.current_plan()
+        indexes = plan.indexes
+        dirty = moved[indexes].any(axis=1)
+        # Neighbours share edge pixels with the cleared footprints, so they are redrawn as well
+        touched = np.zeros(len(moved), bool)
+        touched[indexes[dirty].ravel()] = True
+        dirty |= touched[indexes].any(axis=1)
+        dirty_indexes = np.flatnonzero(dirty)
+
+        # Clear where the dirty triangles were and where they are going
+        cleared = np.zeros(coverage.shape, np.uint8)
+        for triangles in (old_np_points[indexes[dirty]], dest_np_points[indexes[dirty]]):
+            for triangle in triangles:
+                cv2.fillConvexPoly(cleared, triangle, 255)
+        new_face[cleared > 0] = 0
+        coverage[cleared > 0] = 0
+
+        dest_triangles = dest_np_points[indexes]
+        for i in dirty_indexes:
+            warp_triangle_into(
+                canvas=new_face, coverage=coverage,
+                src_points=plan.points[i], src_cropped_triangle=plan.crops[i],
+                dest_triangle=dest_triangles[i], buffers=self.buffers
             )
-        
-        result = swap_new_face(
-            dest_image=dest_image, dest_image_gray=dest_image_gray,
-            dest_convexHull=dest_convexHull, new_face=new_face
-        )
-        result = cv2.medianBlur(result, 3)
-        
-        return cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
+        self.telemetry.count("triangles_rewarped", len(dirty_indexes))
 
-    
-    def swap_image(self, dest_image_path):
-        """Perform face swap on a static image."""
+    def swap_image(self, dest_image_path, full_resolution=True, progress=None):
+        """Perform face swap on a static image.
+
+        The image keeps its resolution, see swap_still. With full_resolution=False images wider
+        than WIDTH are downsized first and swapped like a video frame, progress is not reported then.
+        """
         if self.src_image is None:
             raise ValueError("Source image not set")
     
@@ -114,6 +560,8 @@ class FaceSwapper:
         dest_image = cv2.imread(dest_image_path)
         if dest_image is None:
             raise ValueError(f"Could not load destination image: {dest_image_path}")
+        if full_resolution:
+            return self.swap_still(dest_image, progress=progress)
         
         # Resize if needed while maintaining aspect ratio
         aspect_ratio = dest_image.shape[1] / dest_image.shape[0]
@@ -122,34 +570,48 @@ class FaceSwapper:
             new_height = int(new_width / aspect_ratio)
             dest_image = cv2.resize(dest_image, (new_width, new_height))
         
-        return self.process_frame(dest_image)
+        return self.process_frame(dest_image, detector=self.image_detector)
 
-    def start_video(self):
-        """Initialize video capture for real-time face swapping."""
-        if self.cap is None:
-            self.init_video_capture()
-        return self.cap is not None
+    def start_video(self, source=None):
+        """Open a frame source for streaming, the default camera if none is given."""
+        if source is not None and source is not self.source:
+            self.release_video()
+            self.source = source
+        if self.source is None:
+            self.source = CameraSource(0, self.WIDTH, self.HEIGHT)
+        self.video_detector.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+        if self.smoother is not None:
+            self.smoother.reset()
+        if self.reuse is not None:
+            self.reuse.reset()
+        return self.source.open()
 
     def read_video_frame(self):
-        """Read and process a frame from video capture."""
-        if self.cap is None:
+        """Read and process a frame from the frame source."""
+        if self.source is None or not self.source.is_opened():
             raise ValueError("Video capture not initialized")
             
-        ret, frame = self.cap.read()
+        ret, frame = self.source.read()
         if not ret:
             return None
             
-        return self.process_frame(frame)
+        return self.process_frame(frame, in_place=self.source.fresh_frames)
 
     def release_video(self):
-        """Release video capture resources."""
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
+        """Release the frame source."""
+        if self.source is not None:
+            self.source.release()
 
     def __del__(self):
         """Cleanup resources on deletion."""
+        # __init__ may have failed before everything was created
+        if not hasattr(self, "source"):
+            return
         self.release_video()
+        self.image_detector.close()
+        self.video_detector.close()
 
     def clear_temp_data(self):
         """Clears temporary data such as intermediate frames."""
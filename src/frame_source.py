@@ -0,0 +1,173 @@
+# Where frames come from: camera, video file, image directory or memory
+
+import glob
+import os
+import sys
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".jfif", ".webp")
+
+
+class FrameSource:
+    """Lazily opened source of BGR frames, read() mirrors cv2.VideoCapture.read."""
+    # True when every read() returns a new array nobody else holds, so the reader may draw on it
+    fresh_frames = True
+
+    def __init__(self):
+        self._opened = False
+
+    def open(self):
+        """Open the underlying device or file, returns whether it is usable."""
+        if not self._opened:
+            self._opened = self._open()
+        return self._opened
+
+    def is_opened(self):
+        return self._opened
+
+    def read(self):
+        """Return (ret, frame), opening the source on first use."""
+        if not self.open():
+            return False, None
+        return self._read()
+
+    def release(self):
+        if self._opened:
+            self._release()
+            self._opened = False
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """Live camera through cv2.VideoCapture, DirectShow on Windows like before."""
+    def __init__(self, index=0, width=640, height=480, api=None):
+        super().__init__()
+        self.index = index
+        self.width = width
+        self.height = height
+        if api is None:
+            api = cv2.CAP_DSHOW if sys.platform == "win32" else cv2.CAP_ANY
+        self.api = api
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.index, self.api)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+        self.cap.set(3, self.width)
+        self.cap.set(4, self.height)
+        return True
+
+    def _read(self):
+        return self.cap.read()
+
+    def _release(self):
+        self.cap.release()
+        self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    """Frames decoded from a video file."""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+        return True
+
+    def _read(self):
+        return self.cap.read()
+
+    def _release(self):
+        self.cap.release()
+        self.cap = None
+
+    @property
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS) if self.cap is not None else 0.0
+
+    @property
+    def frame_count(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) if self.cap is not None else 0
+
+
+class ImageDirectorySource(FrameSource):
+    """Still images from a directory or a glob pattern, in sorted order."""
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.paths = []
+        self.position = 0
+        self.current_path = None
+
+    def _open(self):
+        if os.path.isdir(self.path):
+            paths = [os.path.join(self.path, name) for name in os.listdir(self.path)]
+        else:
+            paths = glob.glob(self.path)
+        self.paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.position = 0
+        return True
+
+    def _read(self):
+        # Unreadable files are skipped rather than ending the stream
+        while self.position < len(self.paths):
+            self.current_path = self.paths[self.position]
+            self.position += 1
+            frame = cv2.imread(self.current_path)
+            if frame is not None:
+                return True, frame
+        return False, None
+
+
+class ArraySource(FrameSource):
+    """Frames already in memory, optionally looped forever."""
+    # The same arrays come back on every loop
+    fresh_frames = False
+
+    def __init__(self, frames, loop=False):
+        super().__init__()
+        self.frames = list(frames)
+        self.loop = loop
+        self.position = 0
+
+    def _open(self):
+        self.position = 0
+        return len(self.frames) > 0
+
+    def _read(self):
+        if self.position >= len(self.frames):
+            if not self.loop:
+                return False, None
+            self.position = 0
+        frame = self.frames[self.position]
+        self.position += 1
+        return True, frame
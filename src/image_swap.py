@@ -5,11 +5,30 @@ from PyQt5.QtWidgets import (
     QHBoxLayout, 
     QPushButton, 
     QFileDialog, 
-    QApplication,
+    QProgressBar,
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QImage, QPixmap
-from src.face_swap import FaceSwapper
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from src.display import FrameDisplay
+from src.face_swap import STILL_STEPS, FaceSwapper
+from src.source_cache import SourceCache
+
+# Loading the source and the destination, then the steps of FaceSwapper.swap_still
+SWAP_STEPS = 2 + STILL_STEPS
+
+
+class SwapSignals(QObject):
+    """Carries swap progress and results from the worker thread to the GUI thread, tagged with the job number."""
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class SwapCancelled(Exception):
+    """Raised inside a swap job once a newer job or a cancel has replaced it."""
 
 
 class ImageSwapTab(QWidget):
@@ -18,6 +37,26 @@ class ImageSwapTab(QWidget):
         self.initUI()
         self.source_image_path = None
         self.dest_image_path = None
+        # Full-resolution BGR result, the label only shows a scaled copy
+        self.result_image = None
+        # Cheap to construct and reused for every swap, it never opens a camera.
+        # Stills are often large, so FaceMesh only gets to see the face crops
+        self.face_swapper = FaceSwapper(source_cache=SourceCache(), two_stage=True)
+
+        # Swaps run one at a time on a worker thread, only it touches face_swapper after this point.
+        # Every click or cancel bumps job, queued or running jobs with an older number give up
+        self.job = 0
+        self.signals = SwapSignals()
+        self.signals.progress.connect(self.on_swap_progress)
+        self.signals.finished.connect(self.on_swap_finished)
+        self.signals.failed.connect(self.on_swap_failed)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-swap")
+        # (path, modification time) of the analyzed source and of the cached destination image
+        self.loaded_source = None
+        self.loaded_dest = None
+        self.dest_image = None
+        # Build the landmark model now so the first swap does not pay for it
+        self.executor.submit(self.face_swapper.image_detector.warmup)
         
     def initUI(self):
         # Create main layout
@@ -82,6 +121,7 @@ class ImageSwapTab(QWidget):
         """)
         self.result_label.setAlignment(Qt.AlignCenter)
         self.result_label.setText("Result will appear here")
+        self.result_display = FrameDisplay(640, 320, upscale=True)
         
         result_section.addWidget(QLabel("Result:"))
         result_section.addWidget(self.result_label)
@@ -97,10 +137,15 @@ class ImageSwapTab(QWidget):
         self.save_button.clicked.connect(self.save_result)
         self.save_button.setEnabled(False)
         
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_swap)
+        self.cancel_button.setEnabled(False)
+        
         self.clear_button = QPushButton("Clear All")
         self.clear_button.clicked.connect(self.clear_all)
         
         button_layout.addWidget(self.swap_button)
+        button_layout.addWidget(self.cancel_button)
         button_layout.addWidget(self.save_button)
         button_layout.addWidget(self.clear_button)
         
@@ -109,6 +154,11 @@ class ImageSwapTab(QWidget):
         main_layout.addLayout(result_section)
         main_layout.addLayout(button_layout)
         
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, SWAP_STEPS)
+        self.progress_bar.setVisible(False)
+        main_layout.addWidget(self.progress_bar)
+        
         self.status_label = QLabel()
         main_layout.addWidget(self.status_label)
         
@@ -140,44 +190,103 @@ class ImageSwapTab(QWidget):
         )
             
     def perform_swap(self):
+        """Queue a swap of the current images, any earlier swap still waiting or running is dropped."""
+        self.job += 1
+        self.executor.submit(self._swap, self.job, self.source_image_path, self.dest_image_path)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Processing...")
+
+    def cancel_swap(self):
+        # The job notices at its next step, its result is never shown
+        self.job += 1
+        self.swap_finished("Swap cancelled.")
+
+    def _swap(self, job, source_path, dest_path):
+        """Worker thread side of a swap, skips whatever the previous swap already loaded."""
+        def progress(step, label):
+            if job != self.job:
+                raise SwapCancelled()
+            self.signals.progress.emit(job, step, label)
+
         try:
-            self.status_label.setText("Processing...")
-            QApplication.processEvents()
-        
-            # Initialize FaceSwapper if not already initialized
-            face_swapper = FaceSwapper()
-            face_swapper.set_src_image_path(self.source_image_path)  # Dynamically set source image
-        
-            # Perform the swap
-            result = face_swapper.swap_image(self.dest_image_path)
-        
-            # Convert result to QPixmap and display
-            height, width, channel = result.shape
-            bytes_per_line = channel * width
-            q_image = QImage(result.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_image)
-            scaled_pixmap = pixmap.scaled(640, 320, Qt.KeepAspectRatio)
-            self.result_label.setPixmap(scaled_pixmap)
-        
-            self.save_button.setEnabled(True)
-            self.status_label.setText("Face swap completed successfully!")
-        
+            progress(0, "Analyzing source")
+            source_key = (source_path, os.path.getmtime(source_path))
+            if source_key != self.loaded_source:
+                self.loaded_source = None
+                self.face_swapper.set_src_image_path(source_path)
+                self.loaded_source = source_key
+
+            progress(1, "Loading destination")
+            dest_key = (dest_path, os.path.getmtime(dest_path))
+            if dest_key != self.loaded_dest:
+                self.dest_image = cv2.imread(dest_path)
+                if self.dest_image is None:
+                    raise ValueError(f"Could not load destination image: {dest_path}")
+                self.loaded_dest = dest_key
+
+            result = self.face_swapper.swap_still(
+                self.dest_image,
+                progress=lambda step, total, label: progress(2 + step, label)
+            )
+        except SwapCancelled:
+            return
         except Exception as e:
-            self.status_label.setText(f"Error: {str(e)}")
-            
+            self.signals.failed.emit(job, str(e))
+            return
+        self.signals.finished.emit(job, result)
+
+    def on_swap_progress(self, job, step, label):
+        if job != self.job:
+            return
+        self.progress_bar.setValue(step)
+        self.status_label.setText(f"{label}...")
+
+    def on_swap_finished(self, job, result):
+        if job != self.job:
+            return
+        self.result_image = result
+        # Fit the BGR result to the label and display it
+        self.result_display.show(self.result_label, result)
+        self.save_button.setEnabled(True)
+        self.swap_finished("Face swap completed successfully!")
+
+    def on_swap_failed(self, job, message):
+        if job != self.job:
+            return
+        self.swap_finished(f"Error: {message}")
+
+    def swap_finished(self, message):
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.status_label.setText(message)
 
     def save_result(self):
-        if self.result_label.pixmap():
+        if self.result_image is not None:
             file_name, _ = QFileDialog.getSaveFileName(
                 self, "Save Result", "", "Image Files (*.jpg *.png)"
             )
             if file_name:
-                self.result_label.pixmap().save(file_name)
-                self.status_label.setText(f"Result saved to {file_name}")
+                if not os.path.splitext(file_name)[1]:
+                    file_name += ".png"
+                # An error raised inside a Qt slot would abort the app, report it instead
+                try:
+                    saved = cv2.imwrite(file_name, self.result_image)
+                except cv2.error:
+                    saved = False
+                if saved:
+                    self.status_label.setText(f"Result saved to {file_name}")
+                else:
+                    self.status_label.setText(f"Error: could not save {file_name}")
                 
     def clear_all(self):
+        # Drop a swap still in flight along with the images
+        if self.cancel_button.isEnabled():
+            self.cancel_swap()
         self.source_image_path = None
         self.dest_image_path = None
+        self.result_image = None
         self.source_label.setText("Source Image\n(Click to select)")
         self.dest_label.setText("Destination Image\n(Click to select)")
         self.result_label.setText("Result will appear here")
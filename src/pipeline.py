@@ -0,0 +1,143 @@
+# Capture -> swap -> display running on worker threads
+
+import threading
+from src.telemetry import DISABLED
+
+
+class LatestFrameQueue:
+    """Single-slot queue where a new frame replaces any frame nobody has taken yet."""
+    def __init__(self):
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """Store item, dropping the previous one if it was never consumed. Returns whether one was dropped."""
+        with self._condition:
+            dropped = self._has_item
+            if dropped:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._condition.notify()
+            return dropped
+
+    def get(self, timeout=None):
+        """Wait for the latest item, returns None on timeout or once the queue is closed."""
+        with self._condition:
+            if not self._has_item and not self._closed:
+                self._condition.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._item = None
+            self._has_item = False
+            self._condition.notify_all()
+
+
+class SwapPipeline:
+    """Runs capture, processing and display on separate threads joined by latest-frame-wins queues.
+
+    read_frame returns (ret, frame) like cv2.VideoCapture.read, process_frame turns a frame into
+    a result and on_frame receives every finished result on the display thread. on_stop is
+    called once with an error message when the pipeline ends on its own. Dropped frames and the
+    time spent in on_frame go to telemetry.
+    """
+    def __init__(self, read_frame, process_frame, on_frame, on_stop=None, telemetry=DISABLED):
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.on_frame = on_frame
+        self.on_stop = on_stop
+        self.telemetry = telemetry
+
+        self.captured = LatestFrameQueue()
+        self.processed = LatestFrameQueue()
+        self._running = threading.Event()
+        self._stop_lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def dropped_frames(self):
+        return self.captured.dropped + self.processed.dropped
+
+    def is_running(self):
+        return self._running.is_set()
+
+    def start(self):
+        if self.is_running():
+            return
+        self.captured = LatestFrameQueue()
+        self.processed = LatestFrameQueue()
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="swap-capture", daemon=True),
+            threading.Thread(target=self._process_loop, name="swap-process", daemon=True),
+            threading.Thread(target=self._display_loop, name="swap-display", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop all stages and wait for the worker threads to exit."""
+        self._shutdown()
+        current = threading.current_thread()
+        for thread in self._threads:
+            if thread is not current:
+                thread.join(timeout)
+        self._threads = []
+
+    def _shutdown(self):
+        with self._stop_lock:
+            was_running = self._running.is_set()
+            self._running.clear()
+        self.captured.close()
+        self.processed.close()
+        return was_running
+
+    def _fail(self, message):
+        # Only the first stage to fail reports, the others just see the closed queues
+        if self._shutdown() and self.on_stop is not None:
+            self.on_stop(message)
+
+    def _capture_loop(self):
+        while self._running.is_set():
+            ret, frame = self.read_frame()
+            if not ret:
+                self._fail("Failed to capture frame.")
+                return
+            if self.captured.put(frame):
+                self.telemetry.count("frames_dropped")
+
+    def _process_loop(self):
+        while self._running.is_set():
+            frame = self.captured.get(timeout=0.1)
+            if frame is None:
+                continue
+            try:
+                result = self.process_frame(frame)
+            except Exception as e:
+                self._fail(f"Error while processing frame: {str(e)}")
+                return
+            if self.processed.put(result):
+                self.telemetry.count("frames_dropped")
+
+    def _display_loop(self):
+        while self._running.is_set():
+            result = self.processed.get(timeout=0.1)
+            if result is None:
+                continue
+            try:
+                with self.telemetry.stage("display"):
+                    self.on_frame(result)
+            except Exception as e:
+                self._fail(f"Error while displaying frame: {str(e)}")
+                return
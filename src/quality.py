@@ -0,0 +1,136 @@
+# Adaptive quality for the live swap: trade quality for frame rate under load
+
+from collections import deque
+
+# Each level adds its settings on top of every level before it, cheapest wins last
+QUALITY_LEVELS = (
+    ("full quality", {}),
+    ("half-size detection", {"detect_scale": 0.5}),
+    ("no output smoothing", {"post_filter": False}),
+    ("feather blend", {"blend": "feather"}),
+    ("coarse triangles", {"triangle_density": "coarse"}),
+    ("tracked landmarks", {"keyframe_interval": 10}),
+)
+
+
+class QualityController:
+    """Steps the swapper's quality down while frames miss the target frame time, and back up with headroom.
+
+    Decisions are made on the mean processing time of the last window frames. Quality drops a
+    level when the mean is over the frame budget and rises a level once it has stayed under
+    headroom times the budget for upgrade_wait frames. A level that has to be left again right
+    after rising doubles that wait, so the controller does not keep bouncing between two levels.
+    Call update() from the thread that runs process_frame, settings change between frames.
+    """
+    def __init__(self, swapper, target_fps=25, window=15, headroom=0.7, max_upgrade_wait=600):
+        self.swapper = swapper
+        self.target_fps = target_fps
+        self.window = window
+        self.headroom = headroom
+        self.max_upgrade_wait = max_upgrade_wait
+        self.latencies = deque(maxlen=window)
+        self.base = self.capture(swapper)
+        self.level = 0
+        self.raised = False
+        self.frames_since_change = 0
+        self.upgrade_wait = 2 * window
+
+    @staticmethod
+    def capture(swapper):
+        """The swapper's current settings, restored at level 0."""
+        tracker = swapper.tracker
+        return {
+            "detect_scale": swapper.video_detector.detect_scale,
+            "post_filter": swapper.post_filter,
+            "blend": swapper.blend,
+            "triangle_density": swapper.triangle_density,
+            "keyframe_interval": tracker.keyframe_interval if tracker is not None else None,
+        }
+
+    @property
+    def level_name(self):
+        return QUALITY_LEVELS[self.level][0]
+
+    def set_target_fps(self, target_fps):
+        self.target_fps = target_fps
+
+    def set_base_blend(self, blend):
+        """Blend to use whenever the current level does not override it."""
+        self.base["blend"] = blend
+        self.apply()
+
+    def settings(self, level=None):
+        """Swapper settings at level, the current one by default."""
+        if level is None:
+            level = self.level
+        settings = dict(self.base)
+        for _, overrides in QUALITY_LEVELS[1:level + 1]:
+            settings.update(overrides)
+        # Keep the user's own keyframe interval if it is already sparser
+        if level >= 5 and self.base["keyframe_interval"] is not None:
+            settings["keyframe_interval"] = max(settings["keyframe_interval"], self.base["keyframe_interval"])
+        return settings
+
+    def apply(self):
+        settings = self.settings()
+        swapper = self.swapper
+        swapper.video_detector.detect_scale = settings["detect_scale"]
+        swapper.post_filter = settings["post_filter"]
+        swapper.set_blend(settings["blend"])
+        swapper.set_triangle_density(settings["triangle_density"])
+        interval = settings["keyframe_interval"]
+        swapper.set_tracking(interval is not None, keyframe_interval=interval)
+
+    def applies(self, level):
+        """Whether a level changes anything over the one before it, levels that do not are skipped.
+
+        A level is a no-op when the user's own settings already match it, like a feather base blend.
+        """
+        settings, previous = self.settings(level), self.settings(level - 1)
+        if self.swapper.video_detector.two_stage:
+            # Two-stage detection already feeds FaceMesh small crops and ignores detect_scale
+            del settings["detect_scale"], previous["detect_scale"]
+        return settings != previous
+
+    def next_level(self, step):
+        """The nearest level in direction step (+1 cheaper, -1 better) that applies, None if there is none."""
+        level = self.level + step
+        while 0 < level < len(QUALITY_LEVELS) and not self.applies(level):
+            level += step
+        return level if level < len(QUALITY_LEVELS) else None
+
+    def set_level(self, level, raised=False):
+        self.level = level
+        self.raised = raised
+        self.frames_since_change = 0
+        self.latencies.clear()
+        self.apply()
+        return self.level_name
+
+    def update(self, frame_ms):
+        """Feed one frame's processing time, returns the new level name when quality changed."""
+        self.latencies.append(frame_ms)
+        self.frames_since_change += 1
+        if self.raised and self.frames_since_change > 2 * self.window:
+            # The last step up held, go back to the normal wait
+            self.raised = False
+            self.upgrade_wait = 2 * self.window
+        if len(self.latencies) < self.window:
+            return None
+
+        mean = sum(self.latencies) / len(self.latencies)
+        budget = 1000.0 / self.target_fps
+        if mean > budget:
+            level = self.next_level(1)
+            if level is None:
+                return None
+            if self.raised:
+                self.upgrade_wait = min(self.upgrade_wait * 2, self.max_upgrade_wait)
+            return self.set_level(level)
+        if mean < budget * self.headroom and self.level > 0 and self.frames_since_change >= self.upgrade_wait:
+            return self.set_level(self.next_level(-1), raised=True)
+        return None
+
+    def restore(self):
+        """Back to the settings the swapper had when the controller took over."""
+        self.set_level(0)
@@ -1,4 +1,5 @@
-import cv2
+import threading
+import time
 from PyQt5.QtWidgets import (
     QWidget, 
     QVBoxLayout, 
@@ -6,19 +7,72 @@ from PyQt5.QtWidgets import (
     QPushButton, 
     QTextEdit, 
     QMessageBox, 
-    QFileDialog
+    QFileDialog,
+    QCheckBox,
+    QComboBox,
+    QHBoxLayout,
+    QSpinBox,
+    QProgressBar
 )
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap, QFont
+from src.blending import BLENDERS
+from src.display import FrameDisplay
+from src.pipeline import SwapPipeline
+from src.quality import QualityController
+from src.source_gallery import SourceGallery
+from src.startup import STARTUP
+
+
+class PipelineSignals(QObject):
+    """Carries finished frames, stop notices and warmup progress from worker threads to the GUI thread."""
+    frame_ready = pyqtSignal(object)
+    stopped = pyqtSignal(str)
+    quality_changed = pyqtSignal(str)
+    message = pyqtSignal(str)
+    warmup_progress = pyqtSignal(int, str)
+    warmup_done = pyqtSignal(str)
+
+
+# Landmark models, then the camera
+WARMUP_STEPS = 3
+
 
 class RealTimeFaceSwapTab(QWidget):
     def __init__(self, face_swapper, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.face_swapper = face_swapper  
-        self.cap = self.face_swapper.cap  
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_frame)
+
+        # Pipelined mode: worker threads hand finished frames to the GUI through signals
+        self.pipeline = None
+        self.frame_pending = False
+        self.display_dropped = 0
+        self.signals = PipelineSignals()
+        self.signals.frame_ready.connect(self.show_frame)
+        self.signals.stopped.connect(self.on_pipeline_stopped)
+        self.signals.quality_changed.connect(self.on_quality_changed)
+        self.signals.message.connect(self.log_message)
+        self.signals.warmup_progress.connect(self.on_warmup_progress)
+        self.signals.warmup_done.connect(self.on_warmup_done)
+
+        # Start-to-first-swapped-frame timing, reported once per run
+        self.swap_started = None
+        self.first_swap_reported = True
+
+        # Adaptive quality, only set while swapping with the option enabled
+        self.quality = None
+
+        # Source faces are analyzed in the background and switched in between frames
+        self.gallery = SourceGallery(self.face_swapper)
+
+        # Live stats panel, refreshed from the swapper's telemetry twice a second
+        self.telemetry = self.face_swapper.telemetry
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
         self.setup_ui()  
+        self.start_warmup()
 
     def setup_ui(self):
         """Sets up the user interface."""
@@ -34,12 +88,70 @@ class RealTimeFaceSwapTab(QWidget):
         self.video_feed_label.setFixedSize(640, 480)  # Adjust to desired video resolution
         self.video_feed_label.setStyleSheet("border: 1px solid black;")
         layout.addWidget(self.video_feed_label, alignment=Qt.AlignCenter)
+        # Frames are fitted to the label once and painted straight from BGR memory
+        self.display = FrameDisplay(self.video_feed_label.width(), self.video_feed_label.height())
 
         # Button to select the source image
         self.select_image_button = QPushButton("Select Source Image")
         self.select_image_button.clicked.connect(self.select_source_image)
         layout.addWidget(self.select_image_button)
 
+        # Every selected source stays in the gallery and can be switched to while swapping
+        source_layout = QHBoxLayout()
+        source_layout.addWidget(QLabel("Source:"))
+        self.source_combo = QComboBox()
+        self.source_combo.currentTextChanged.connect(self.select_source)
+        source_layout.addWidget(self.source_combo)
+        layout.addLayout(source_layout)
+
+        # Run capture, swap and display on separate threads instead of the GUI timer
+        self.pipeline_checkbox = QCheckBox("Pipelined mode (capture, swap and display on worker threads)")
+        layout.addWidget(self.pipeline_checkbox)
+
+        # Blend backend, seamless is Poisson (best, slowest), feather and multiband are cheap
+        blend_layout = QHBoxLayout()
+        blend_layout.addWidget(QLabel("Blend:"))
+        self.blend_combo = QComboBox()
+        self.blend_combo.addItems(list(BLENDERS))
+        self.blend_combo.setCurrentText(self.face_swapper.blend)
+        self.blend_combo.currentTextChanged.connect(self.select_blend)
+        blend_layout.addWidget(self.blend_combo)
+        layout.addLayout(blend_layout)
+
+        # Lower quality in steps whenever frames take longer than the target frame rate allows
+        quality_layout = QHBoxLayout()
+        self.adaptive_checkbox = QCheckBox("Adaptive quality, target FPS:")
+        quality_layout.addWidget(self.adaptive_checkbox)
+        self.target_fps_spinbox = QSpinBox()
+        self.target_fps_spinbox.setRange(5, 60)
+        self.target_fps_spinbox.setValue(25)
+        self.target_fps_spinbox.valueChanged.connect(self.select_target_fps)
+        quality_layout.addWidget(self.target_fps_spinbox)
+        layout.addLayout(quality_layout)
+
+        # Per-stage timings and counters, collecting them is off unless this is checked
+        stats_layout = QHBoxLayout()
+        self.stats_checkbox = QCheckBox("Show live stats")
+        self.stats_checkbox.toggled.connect(self.toggle_stats)
+        stats_layout.addWidget(self.stats_checkbox)
+        self.export_stats_button = QPushButton("Export Stats Trace")
+        self.export_stats_button.clicked.connect(self.export_stats)
+        stats_layout.addWidget(self.export_stats_button)
+        layout.addLayout(stats_layout)
+
+        self.stats_label = QLabel()
+        stats_font = QFont("Monospace", 8)
+        stats_font.setStyleHint(QFont.TypeWriter)
+        self.stats_label.setFont(stats_font)
+        self.stats_label.setVisible(False)
+        layout.addWidget(self.stats_label)
+
+        # Model and camera warmup progress, hidden once everything is ready
+        self.warmup_bar = QProgressBar()
+        self.warmup_bar.setRange(0, WARMUP_STEPS)
+        self.warmup_bar.setFormat("Loading MediaPipe...")
+        layout.addWidget(self.warmup_bar)
+
         # Start button to start the real-time face swap
         self.start_button = QPushButton("Start Face Swapping")
         self.start_button.clicked.connect(self.start_swapping)
@@ -64,30 +176,119 @@ class RealTimeFaceSwapTab(QWidget):
         self.setLayout(layout)
 
     def select_source_image(self):
-        """Opens a file dialog to select a source image."""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Opens a file dialog to add one or more source images to the gallery, the first one is used."""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "Select Source Image", "", "Image Files (*.png *.jpg *.jpeg *.bmp)"
         )
-        if file_path:
-            self.face_swapper.set_src_image(cv2.imread(file_path))
-            self.log_message(f"Source image set: {file_path}")
-        else:
+        if not file_paths:
             self.log_message("No image selected.")
+            return
+        names = [self.gallery.add(file_path) for file_path in file_paths]
+        for name in names:
+            if self.source_combo.findText(name) < 0:
+                self.source_combo.addItem(name)
+        if self.source_combo.currentText() == names[0]:
+            self.select_source(names[0])
+        else:
+            self.source_combo.setCurrentText(names[0])
+
+    def select_source(self, name):
+        """Switches to a gallery source once it is analyzed, the live feed keeps running meanwhile."""
+        if not name:
+            return
+
+        def done(result):
+            if isinstance(result, Exception):
+                self.signals.message.emit(f"Could not use source {name}: {str(result)}")
+            else:
+                self.signals.message.emit(f"Source image set: {name}")
+
+        self.gallery.activate(name, callback=done)
+
+    def select_blend(self, blend):
+        """Switches the blend backend, takes effect from the next frame."""
+        if self.quality is not None:
+            # The controller may be overriding the blend right now, it falls back to this one
+            self.quality.set_base_blend(blend)
+        else:
+            self.face_swapper.set_blend(blend)
+        self.log_message(f"Blend backend set: {blend}")
+
+    def select_target_fps(self, target_fps):
+        if self.quality is not None:
+            self.quality.set_target_fps(target_fps)
+
+    def process_frame(self, frame):
+        """Swaps one frame, feeding its processing time to the adaptive quality controller if enabled."""
+        quality = self.quality
+        # Camera frames are new arrays every read, so the face is pasted into them directly
+        in_place = self.face_swapper.source.fresh_frames
+        if quality is None:
+            result = self.face_swapper.process_frame(frame, in_place=in_place)
+        else:
+            start = time.perf_counter()
+            result = self.face_swapper.process_frame(frame, in_place=in_place)
+            level = quality.update((time.perf_counter() - start) * 1000.0)
+            if level is not None:
+                self.signals.quality_changed.emit(level)
+        if not self.first_swap_reported:
+            self.report_first_swap()
+        return result
+
+    def report_first_swap(self):
+        if not any(face["swapped"] for face in self.face_swapper.last_faces):
+            return
+        self.first_swap_reported = True
+        since_start = (time.perf_counter() - self.swap_started) * 1000.0
+        since_launch = STARTUP.mark("first_swapped_frame")
+        self.signals.message.emit(
+            f"First swapped frame {since_start:.0f} ms after start ({since_launch:.0f} ms after launch)")
+
+    def start_warmup(self):
+        """Builds the landmark models and opens the camera on a background thread."""
+        self.start_button.setEnabled(False)
+        self.warmup_bar.setVisible(True)
+        threading.Thread(target=self._warmup, name="swap-warmup", daemon=True).start()
+
+    def _warmup(self):
+        def progress(step, _, label):
+            self.signals.warmup_progress.emit(step, label)
+        try:
+            self.face_swapper.warmup(progress=progress)
+            self.signals.warmup_progress.emit(WARMUP_STEPS - 1, "Opening camera")
+            camera_ready = self.face_swapper.start_video()
+        except Exception as e:
+            self.signals.warmup_done.emit(f"Warmup failed: {str(e)}")
+            return
+        self.signals.warmup_done.emit("" if camera_ready else "Camera not available, it is retried on start.")
+
+    def on_warmup_progress(self, step, label):
+        self.warmup_bar.setValue(step)
+        self.warmup_bar.setFormat(f"{label}...")
+
+    def on_warmup_done(self, problem):
+        self.warmup_bar.setVisible(False)
+        self.start_button.setEnabled(not self.is_swapping())
+        ready = STARTUP.mark("models_ready")
+        self.log_message(f"Models ready {ready:.0f} ms after launch.")
+        if problem:
+            self.log_message(problem)
+
+    def on_quality_changed(self, level):
+        self.log_message(f"Adaptive quality: {level}")
 
     def update_frame(self):
         """Updates the video feed with face-swapping applied."""
-        ret, frame = self.cap.read()
+        ret, frame = self.face_swapper.source.read()
         if not ret:
             self.log_message("Failed to capture frame.")
             self.stop_swapping()
             return
 
         # Process frame and display it
-        result_frame = self.face_swapper.process_frame(frame)
-        height, width, channel = result_frame.shape
-        bytes_per_line = channel * width
-        qimage = QImage(result_frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        self.video_feed_label.setPixmap(QPixmap.fromImage(qimage))
+        result_frame = self.process_frame(frame)
+        with self.telemetry.stage("display"):
+            self.display.show(self.video_feed_label, result_frame)
 
     def start_swapping(self):
         """Starts the real-time face-swapping."""
@@ -95,19 +296,118 @@ class RealTimeFaceSwapTab(QWidget):
             QMessageBox.warning(self, "Warning", "Please select a source image before starting face swapping.")
             return
 
-        if not self.timer.isActive():  # Ensure only one timer instance
+        if self.is_swapping():
+            return
+
+        # Usually a no-op, the warmup opened the camera already
+        if not self.face_swapper.start_video():
+            QMessageBox.warning(self, "Warning", "Could not open the camera.")
+            return
+        self.swap_started = time.perf_counter()
+        self.first_swap_reported = False
+
+        if self.adaptive_checkbox.isChecked():
+            self.quality = QualityController(self.face_swapper, target_fps=self.target_fps_spinbox.value())
+
+        if self.pipeline_checkbox.isChecked():
+            self.frame_pending = False
+            self.display_dropped = 0
+            self.pipeline = SwapPipeline(
+                read_frame=self.face_swapper.source.read,
+                process_frame=self.process_frame,
+                on_frame=self.publish_frame,
+                on_stop=self.signals.stopped.emit,
+                telemetry=self.telemetry
+            )
+            self.pipeline.start()
+        else:
             self.timer.start(30)  # ~30 FPS
-            self.start_button.setEnabled(False)
-            self.stop_button.setEnabled(True)
-            self.log_message("Real-time face swapping started.")
+
+        # Stats describe the current run only
+        self.telemetry.reset()
+        self.start_button.setEnabled(False)
+        self.pipeline_checkbox.setEnabled(False)
+        self.adaptive_checkbox.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.log_message("Real-time face swapping started.")
 
     def stop_swapping(self):
         """Stops the real-time face-swapping."""
-        if self.timer.isActive():  # Only stop if the timer is running
+        if not self.is_swapping():
+            return
+
+        if self.timer.isActive():
             self.timer.stop()
-            self.start_button.setEnabled(True)
-            self.stop_button.setEnabled(False)
-            self.log_message("Real-time face swapping stopped.")
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            dropped = self.pipeline.dropped_frames + self.display_dropped
+            self.log_message(f"Frames dropped by the pipeline: {dropped}")
+            self.pipeline = None
+        if self.quality is not None:
+            # Processing has stopped, so the original settings can go back in safely
+            self.quality.restore()
+            self.quality = None
+        self.face_swapper.release_video()
+
+        self.start_button.setEnabled(True)
+        self.pipeline_checkbox.setEnabled(True)
+        self.adaptive_checkbox.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.log_message("Real-time face swapping stopped.")
+
+    def is_swapping(self):
+        return self.timer.isActive() or self.pipeline is not None
+
+    def publish_frame(self, result_frame):
+        """Runs on the pipeline display thread, fits the frame to the label and hands it to the GUI."""
+        # Latest frame wins here as well, skip frames while the GUI is still painting the last one
+        if self.frame_pending:
+            self.display_dropped += 1
+            self.telemetry.count("frames_dropped")
+            return
+        # Frames in the swapper's output ring get overwritten, so those are scaled or copied into a
+        # display buffer that stays untouched until show_frame is done with it. A captured frame
+        # swapped in place belongs to nobody else any more and is handed over as is
+        frame = self.display.fit(result_frame, copy=self.face_swapper.buffers.owns(result_frame))
+        self.frame_pending = True
+        self.signals.frame_ready.emit(frame)
+
+    def show_frame(self, frame):
+        """Paints a finished frame from the pipeline."""
+        if self.pipeline is not None:
+            start = time.perf_counter()
+            self.video_feed_label.setPixmap(QPixmap.fromImage(self.display.to_qimage(frame)))
+            self.telemetry.record("display", (time.perf_counter() - start) * 1000.0)
+        self.frame_pending = False
+
+    def on_pipeline_stopped(self, message):
+        self.log_message(message)
+        self.stop_swapping()
+
+    def toggle_stats(self, checked):
+        """Turns stats collection and the stats panel on or off."""
+        self.telemetry.enable(checked)
+        self.stats_label.setVisible(checked)
+        if checked:
+            self.telemetry.reset()
+            self.stats_timer.start(500)
+        else:
+            self.stats_timer.stop()
+
+    def update_stats(self):
+        self.stats_label.setText(self.telemetry.format_summary())
+
+    def export_stats(self):
+        """Saves the recent per-frame stats as a CSV or JSON trace."""
+        if not self.telemetry.frames:
+            self.log_message("No stats collected yet, enable live stats while swapping.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Stats Trace", "swap_trace.csv", "CSV Files (*.csv);;JSON Files (*.json)"
+        )
+        if file_path:
+            self.telemetry.export(file_path)
+            self.log_message(f"Stats trace saved: {file_path}")
 
     def log_message(self, message):
         """Logs a message to the console."""
@@ -121,4 +421,5 @@ class RealTimeFaceSwapTab(QWidget):
     def closeEvent(self, event):
         """Handles the window close event."""
         self.stop_swapping()
+        self.gallery.close()
         event.accept()
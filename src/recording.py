@@ -0,0 +1,185 @@
+# Recording camera frames to a file and playing them back as a frame source
+
+import queue
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+from src.frame_source import FrameSource
+
+# File layout: MAGIC, then per frame a little-endian (timestamp seconds, byte count) header and the
+# encoded image. Timestamps count from the first frame, images decode with cv2.imdecode
+MAGIC = b"FSWAPREC1\n"
+FRAME_HEADER = struct.Struct("<dI")
+
+# Encoder parameters per codec, PNG is lossless and fast at level 1
+CODECS = {
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    ".jpg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+}
+
+
+class FrameRecorder:
+    """Encodes frames and appends them to a recording file on its own thread.
+
+    The queue is bounded and write() blocks when it is full, frames are never dropped so the
+    recording holds exactly what the camera delivered.
+    """
+    def __init__(self, path, codec=".png", max_queue=32):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.path = path
+        self.codec = codec
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.start = None
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self.thread.start()
+
+    def write(self, frame, timestamp=None):
+        """Queue a frame, timestamp is in perf_counter seconds and defaults to now."""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self.start is None:
+            self.start = timestamp
+        self.frames.put((timestamp - self.start, frame.copy()))
+
+    def close(self):
+        """Flush the queued frames and close the file."""
+        self.frames.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def _run(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            timestamp, frame = item
+            ok, data = cv2.imencode(self.codec, frame, CODECS[self.codec])
+            if not ok:
+                continue
+            self.file.write(FRAME_HEADER.pack(timestamp, len(data)))
+            self.file.write(data.tobytes())
+            self.written += 1
+
+
+def read_recording(path):
+    """Yield (timestamp, encoded bytes) for every frame of a recording."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a frame recording: {path}")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            timestamp, size = FRAME_HEADER.unpack(header)
+            data = f.read(size)
+            if len(data) < size:
+                # Cut off mid-frame, the recorder was not closed cleanly
+                return
+            yield timestamp, data
+
+
+class RecordingSource(FrameSource):
+    """Passes the frames of another source through while recording them to path."""
+    def __init__(self, source, path, codec=".png"):
+        super().__init__()
+        self.source = source
+        self.path = path
+        self.codec = codec
+        self.recorder = None
+
+    @property
+    def fresh_frames(self):
+        # The recorder copies frames as they pass, so drawing on them afterwards is fine
+        return self.source.fresh_frames
+
+    def _open(self):
+        if not self.source.open():
+            return False
+        self.recorder = FrameRecorder(self.path, self.codec)
+        return True
+
+    def _read(self):
+        ret, frame = self.source.read()
+        if ret:
+            self.recorder.write(frame)
+        return ret, frame
+
+    def _release(self):
+        self.source.release()
+        self.recorder.close()
+        self.recorder = None
+
+
+class ReplaySource(FrameSource):
+    """Frames of a recording, either at the recorded pace or as fast as they are read.
+
+    Paced reads behave like a camera: they block until the frame is due, and a reader that falls
+    behind gets the newest due frame, the ones it missed are counted in skipped. Frames stay
+    encoded in memory and are decoded on read, before any waiting, so decoding does not add to
+    the pace. frame_time is the perf_counter time the last frame was due, or was read when unpaced.
+    """
+    def __init__(self, path, paced=True, loop=False):
+        super().__init__()
+        self.path = path
+        self.paced = paced
+        self.loop = loop
+        self.frames = []
+        self.position = 0
+        self.start = None
+        self.skipped = 0
+        self.frame_time = None
+
+    def _open(self):
+        self.frames = list(read_recording(self.path))
+        self.position = 0
+        self.start = None
+        self.skipped = 0
+        return len(self.frames) > 0
+
+    def _read(self):
+        if self.position >= len(self.frames):
+            if not self.loop:
+                return False, None
+            self.position = 0
+            self.start = None
+
+        if self.paced:
+            now = time.perf_counter()
+            if self.start is None:
+                self.start = now - self.frames[self.position][0]
+            while self.position + 1 < len(self.frames) and self.start + self.frames[self.position + 1][0] <= now:
+                self.position += 1
+                self.skipped += 1
+        timestamp, data = self.frames[self.position]
+        self.position += 1
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+        if self.paced:
+            self.frame_time = self.start + timestamp
+            delay = self.frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            self.frame_time = time.perf_counter()
+        return frame is not None, frame
+
+    @property
+    def frame_count(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return self.frames[-1][0] if self.frames else 0.0
+
+    @property
+    def fps(self):
+        """Average frame rate of the recording."""
+        if len(self.frames) < 2 or self.duration <= 0:
+            return 0.0
+        return (len(self.frames) - 1) / self.duration
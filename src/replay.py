@@ -0,0 +1,191 @@
+# End-to-end measurement of the live swap pipeline on a recorded camera stream
+
+import os
+import platform
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from src.benchmark import max_rss_mb
+from src.display import FrameDisplay
+from src.face_swap import FaceSwapper
+from src.frame_source import CameraSource
+from src.pipeline import SwapPipeline
+from src.quality import QualityController
+from src.recording import RecordingSource, ReplaySource
+
+# The real-time tab's swapper settings and video label size
+LIVE_SWAPPER = {"smoothing": True, "reuse": True}
+DISPLAY_SIZE = (640, 480)
+
+
+def record_camera(path, seconds, camera=0, width=640, height=480, codec=".png", log=print):
+    """Record seconds of camera frames to path, returns the number of frames written."""
+    source = RecordingSource(CameraSource(camera, width, height), path, codec)
+    if not source.open():
+        raise ValueError(f"Could not open camera {camera}")
+    recorder = source.recorder
+    log(f"Recording {seconds:.0f}s from camera {camera} to {path}")
+    end = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < end:
+            ret, _ = source.read()
+            if not ret:
+                log("Camera stopped delivering frames")
+                break
+    finally:
+        source.release()
+    return recorder.written
+
+
+def latency_stats(durations):
+    durations = np.array(durations, np.float64)
+    if not durations.size:
+        return {"samples": 0}
+    return {
+        "samples": int(durations.size),
+        "mean_ms": float(durations.mean()),
+        "p50_ms": float(np.percentile(durations, 50)),
+        "p95_ms": float(np.percentile(durations, 95)),
+        "p99_ms": float(np.percentile(durations, 99)),
+        "max_ms": float(durations.max()),
+    }
+
+
+def run_replay(recording, source_path, paced=True, pipelined=True, swapper_kwargs=None,
+               adaptive=False, target_fps=25, drain_timeout=5.0, log=print):
+    """Feed a recording through FaceSwapper like the real-time tab does and report on it.
+
+    Every frame is timed from when the camera would have delivered it until the display stage is
+    done with it, the display stage fits and wraps frames like the tab without painting them.
+    pipelined runs capture, swap and display on SwapPipeline threads, otherwise they run one after
+    another like the tab's timer mode.
+    """
+    replay = ReplaySource(recording, paced=paced)
+    if not replay.open():
+        raise ValueError(f"Empty or unreadable recording: {recording}")
+
+    settings = dict(LIVE_SWAPPER, **(swapper_kwargs or {}))
+    swapper = FaceSwapper(**settings)
+    swapper.set_src_image_path(source_path)
+    swapper.warmup()
+    swapper.start_video(replay)
+    swapper.telemetry.enable()
+    quality = QualityController(swapper, target_fps=target_fps) if adaptive else None
+    display = FrameDisplay(*DISPLAY_SIZE)
+
+    read_count = 0
+    taken_count = 0
+    process_ms = []
+    latencies = []
+    shown_at = []
+    ended = threading.Event()
+    pipeline = None
+
+    def read_frame():
+        nonlocal read_count
+        if pipeline is not None and not paced:
+            # At max speed wait for the swap stage to take the previous frame, so the run measures
+            # throughput rather than how many frames the queue can throw away
+            while read_count > taken_count + pipeline.captured.dropped and pipeline.is_running():
+                time.sleep(0.001)
+        ret, frame = replay.read()
+        if not ret:
+            # Let the frames still in flight reach the display before the pipeline shuts down
+            deadline = time.perf_counter() + drain_timeout
+            while pipeline is not None and time.perf_counter() < deadline:
+                if len(latencies) + pipeline.dropped_frames >= read_count:
+                    break
+                time.sleep(0.005)
+            ended.set()
+            return False, None
+        read_count += 1
+        return True, (replay.frame_time, frame)
+
+    def process_frame(item):
+        nonlocal taken_count
+        taken_count += 1
+        captured_at, frame = item
+        start = time.perf_counter()
+        result = swapper.process_frame(frame, in_place=replay.fresh_frames)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        process_ms.append(elapsed)
+        if quality is not None:
+            level = quality.update(elapsed)
+            if level is not None:
+                log(f"Adaptive quality: {level}")
+        return captured_at, result
+
+    def show_frame(item):
+        captured_at, result = item
+        display.to_qimage(display.fit(result, copy=swapper.buffers.owns(result)))
+        now = time.perf_counter()
+        latencies.append((now - captured_at) * 1000.0)
+        shown_at.append(now)
+
+    started = time.perf_counter()
+    if pipelined:
+        stopped = []
+        done = threading.Event()
+
+        def on_stop(message):
+            stopped.append(message)
+            done.set()
+
+        pipeline = SwapPipeline(read_frame, process_frame, show_frame, on_stop=on_stop, telemetry=swapper.telemetry)
+        pipeline.start()
+        done.wait()
+        pipeline.stop()
+        if not ended.is_set():
+            raise ValueError(stopped[0])
+        pipeline_dropped = pipeline.dropped_frames
+    else:
+        while True:
+            ret, item = read_frame()
+            if not ret:
+                break
+            show_frame(process_frame(item))
+        pipeline_dropped = 0
+    elapsed = (shown_at[-1] if shown_at else time.perf_counter()) - started
+
+    if quality is not None:
+        quality.restore()
+    swapper.release_video()
+
+    frames_shown = len(latencies)
+    intervals = np.diff(shown_at) * 1000.0 if len(shown_at) > 1 else []
+    results = {
+        "latency": latency_stats(latencies),
+        "frame_interval": latency_stats(intervals),
+        "process": latency_stats(process_ms),
+        "fps": frames_shown / elapsed if elapsed > 0 else 0.0,
+        "frames_shown": frames_shown,
+        "frames_dropped": replay.frame_count - frames_shown,
+        "dropped_by_source": replay.skipped,
+        "dropped_by_pipeline": pipeline_dropped,
+    }
+    log(f"{frames_shown}/{replay.frame_count} frames shown at {results['fps']:.1f} fps, "
+        f"latency {results['latency'].get('mean_ms', 0.0):.1f} ms mean")
+
+    return {
+        "meta": {
+            "recording": recording,
+            "frames": replay.frame_count,
+            "recorded_fps": replay.fps,
+            "duration_s": replay.duration,
+            "source": source_path,
+            "paced": paced,
+            "pipelined": pipelined,
+            "adaptive": adaptive,
+            "swapper": settings,
+            "python": sys.version.split()[0],
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "max_rss_mb": max_rss_mb(),
+        },
+        # Same layout as the stage benchmark, so benchmark.compare works on replay reports too
+        "results": {"replay": results},
+        "stages": swapper.telemetry.summary(),
+    }
@@ -0,0 +1,99 @@
+# Persistent cache of source-face analysis so known faces load instantly
+
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "deepfake_sch_lisa", "sources")
+
+
+class SourceCache:
+    """Stores landmarks, hull, triangle indexes and warp plan rects per source in compact .npz files.
+
+    Entries are keyed by a hash of the decoded image plus the analysis settings, so the same
+    picture under another name still hits. Files are evicted least recently used first once the
+    directory grows past max_bytes.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, image, settings):
+        """Content hash of an image and the settings that affect its analysis."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((image.shape, str(image.dtype), sorted(settings.items()))).encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key, names=()):
+        """Return the cached arrays for key as a dict, or None on a miss.
+
+        An entry lacking any of names counts as corrupt.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+            for name in names:
+                entry[name]
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            # Never stored, or evicted by another thread or process meanwhile
+            return None
+        except Exception:
+            # Truncated or corrupt entry (BadZipFile, missing arrays, ...), drop it so it gets rebuilt
+            self._remove(path)
+            return None
+        return entry
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def store(self, key, **arrays):
+        """Write arrays for key atomically, then trim the cache to its size budget."""
+        path = self._path(key)
+        # A unique temp file per writer, threads of one process share the directory too
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.directory, name))
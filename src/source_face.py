@@ -0,0 +1,44 @@
+# One analyzed source face, everything the warp needs from it
+
+import itertools
+import numpy as np
+from src.face_mesh import WarpPlan, get_coarse_triangles
+
+# Serial numbers tell sources apart without relying on object ids
+_serials = itertools.count(1)
+
+
+class SourceFace:
+    """Landmarks, hull, triangles and warp plans of one source image.
+
+    Built once by FaceSwapper.analyze_source and not changed afterwards, apart from the coarse
+    plan that is added on first use. FaceSwapper swaps whole SourceFace objects, so a frame never
+    mixes data from two sources.
+    """
+    def __init__(self, image, landmark_points, convexhull, indexes_triangles, rects=None, name=None):
+        self.serial = next(_serials)
+        self.name = name
+        self.image = image
+        self.landmark_points = landmark_points
+        self.convexhull = convexhull
+        self.indexes_triangles = indexes_triangles
+        self.warp_plan = WarpPlan(indexes_triangles, landmark_points, image, rects=rects)
+        self.coarse_plan = None
+
+    def plan(self, density="full"):
+        """Warp plan for a triangle density, see face_swap.TRIANGLE_DENSITIES."""
+        if density == "coarse":
+            if self.coarse_plan is None:
+                self.coarse_plan = WarpPlan(
+                    get_coarse_triangles(self.landmark_points), self.landmark_points, self.image)
+            return self.coarse_plan
+        return self.warp_plan
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the image and the warp plans."""
+        total = self.image.nbytes + np.asarray(self.landmark_points).nbytes
+        for plan in (self.warp_plan, self.coarse_plan):
+            if plan is not None:
+                total += plan.nbytes
+        return total
@@ -0,0 +1,137 @@
+# Several source faces ready to swap in, analyzed in the background
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import cv2
+
+
+class SourceGallery:
+    """Named source faces for one FaceSwapper, analyzed on a background thread.
+
+    Every added image path stays known, but analyzed SourceFaces are dropped least recently used
+    first once together they take more than max_bytes. A dropped face is analyzed again on its
+    next use, which is quick when the swapper has a SourceCache. The active face is never dropped.
+    """
+    def __init__(self, swapper, max_bytes=256 * 1024 * 1024):
+        self.swapper = swapper
+        self.max_bytes = max_bytes
+        self.paths = OrderedDict()
+        self.loaded = OrderedDict()
+        self.pending = {}
+        self.requested = None
+        self._lock = threading.Lock()
+        # One worker, analysis shares the swapper's image detector anyway
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="source-gallery")
+
+    def names(self):
+        with self._lock:
+            return list(self.paths)
+
+    def add(self, path, name=None, preload=True):
+        """Register an image path under name, returns the name.
+
+        The default name is the file name, with its directory or a counter added when another
+        image already uses it. Adding a known path again reuses its name.
+        """
+        with self._lock:
+            name = name or self._default_name(path)
+            self.paths[name] = path
+            # A new file under a known name replaces the old analysis
+            self.loaded.pop(name, None)
+        if preload:
+            self.load(name)
+        return name
+
+    def _default_name(self, path):
+        path = os.path.abspath(path)
+        for name, known in self.paths.items():
+            if os.path.abspath(known) == path:
+                return name
+        file_name = os.path.basename(path)
+        name = file_name
+        if name in self.paths:
+            name = f"{file_name} ({os.path.basename(os.path.dirname(path))})"
+        count = 2
+        while name in self.paths:
+            name = f"{file_name} ({count})"
+            count += 1
+        return name
+
+    def remove(self, name):
+        with self._lock:
+            self.paths.pop(name, None)
+            self.loaded.pop(name, None)
+
+    def load(self, name):
+        """Future of the SourceFace for name, analyzing it in the background if needed."""
+        with self._lock:
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+                future = Future()
+                future.set_result(self.loaded[name])
+                return future
+            if name in self.pending:
+                return self.pending[name]
+            if name not in self.paths:
+                raise ValueError(f"Unknown source: {name}")
+            future = self._executor.submit(self._analyze, name, self.paths[name])
+            self.pending[name] = future
+            return future
+
+    def _analyze(self, name, path):
+        try:
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError(f"Could not load source image: {path}")
+            source_face = self.swapper.analyze_source(image, name=name)
+            with self._lock:
+                if self.paths.get(name) == path:
+                    self.loaded[name] = source_face
+            self.evict()
+            return source_face
+        finally:
+            with self._lock:
+                self.pending.pop(name, None)
+
+    def activate(self, name, callback=None):
+        """Switch the swapper to name as soon as it is analyzed, frames keep flowing meanwhile.
+
+        Only the most recent request wins if several are in flight. callback, if given, is called
+        from the worker thread with the SourceFace, or with the exception if analysis failed.
+        """
+        self.requested = name
+
+        def done(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None and self.requested == name:
+                self.swapper.use_source(future.result())
+            if callback is not None:
+                callback(error if error is not None else future.result())
+
+        future = self.load(name)
+        future.add_done_callback(done)
+        return future
+
+    def memory_used(self):
+        with self._lock:
+            return sum(face.nbytes for face in self.loaded.values())
+
+    def evict(self):
+        """Drop least recently used faces until the loaded ones fit in max_bytes."""
+        active = self.swapper.source_face
+        with self._lock:
+            total = sum(face.nbytes for face in self.loaded.values())
+            for name, face in list(self.loaded.items()):
+                if total <= self.max_bytes:
+                    break
+                if face is active:
+                    continue
+                del self.loaded[name]
+                total -= face.nbytes
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
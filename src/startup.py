@@ -0,0 +1,62 @@
+# Startup milestones measured from process start
+
+import ctypes
+import os
+import sys
+import time
+
+
+def process_start():
+    """perf_counter time at which the process started, interpreter startup included.
+
+    Falls back to now where the OS does not tell, or when the process is older than a minute
+    and so not a fresh launch. main_window imports this module before anything heavy, so the
+    fallback misses little more than the interpreter itself.
+    """
+    now = time.perf_counter()
+    try:
+        if sys.platform.startswith("linux"):
+            # Field 22 of /proc/self/stat is the start time in clock ticks since boot
+            with open("/proc/self/stat") as f:
+                started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+            with open("/proc/uptime") as f:
+                age = float(f.read().split()[0]) - started
+        elif sys.platform == "win32":
+            # FILETIMEs count 100 ns steps, creation time is the first of GetProcessTimes' four
+            times = [ctypes.c_ulonglong() for _ in range(4)]
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), *[ctypes.byref(t) for t in times]):
+                return now
+            current = ctypes.c_ulonglong()
+            kernel32.GetSystemTimeAsFileTime(ctypes.byref(current))
+            age = (current.value - times[0].value) / 1e7
+        else:
+            return now
+    except (OSError, ValueError, IndexError):
+        return now
+    return now - age if 0 <= age < 60 else now
+
+
+PROCESS_START = process_start()
+
+
+class StartupTimer:
+    """Records the first time each named milestone is reached, in milliseconds since process start."""
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.marks = {}
+
+    def mark(self, name):
+        """Record name if it is new, returns its time in milliseconds."""
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self.start) * 1000.0
+        return self.marks[name]
+
+    def reached(self, name):
+        return name in self.marks
+
+    def report(self):
+        return ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks.items())
+
+
+STARTUP = StartupTimer()
@@ -0,0 +1,176 @@
+# Per-stage timers and counters for the swap hot path
+
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+
+STAGES = ("detect", "triangulate", "warp", "composite", "blend", "post", "display")
+
+# Shared no-op context handed out while telemetry is disabled
+_NO_STAGE = nullcontext()
+
+
+class _Stage:
+    """Context manager timing one stage into the current frame."""
+    __slots__ = ("telemetry", "name", "start")
+
+    def __init__(self, telemetry, name):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.telemetry.record(self.name, (time.perf_counter() - self.start) * 1000.0)
+
+
+class Telemetry:
+    """Keeps stage timings and counters of the most recent frames in a ring buffer.
+
+    Every frame becomes one row of milliseconds per stage plus the counters bumped during it.
+    While disabled every call returns after a single attribute check. Rows are collected per
+    thread, timings or counts from a thread with no open frame (the display thread of the
+    pipeline) go to the last finished frame.
+    """
+    def __init__(self, capacity=300, enabled=False, log_interval=5.0):
+        self.enabled = enabled
+        self.frames = deque(maxlen=capacity)
+        self.counters = {}
+        self.log_interval = log_interval
+        self._warnings = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.frames.clear()
+            self.counters = {}
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._local.row = {"time": time.time()}
+        self._local.start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        row = getattr(self._local, "row", None)
+        if row is None:
+            return
+        row["total"] = (time.perf_counter() - self._local.start) * 1000.0
+        self._local.row = None
+        with self._lock:
+            self.frames.append(row)
+
+    def stage(self, name):
+        """Time a with-block as stage name, repeated stages within a frame add up."""
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, milliseconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            row = self._row()
+            if row is not None:
+                row[name] = row.get(name, 0.0) + milliseconds
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+            row = self._row()
+            if row is not None:
+                row[name] = row.get(name, 0) + n
+
+    def _row(self):
+        row = getattr(self._local, "row", None)
+        if row is None and self.frames:
+            row = self.frames[-1]
+        return row
+
+    def warn(self, name, message):
+        """Count a diagnostic and print it, repeats within log_interval seconds are only counted."""
+        self.count(name)
+        now = time.perf_counter()
+        with self._lock:
+            last, suppressed = self._warnings.get(name, (None, 0))
+            if last is not None and now - last < self.log_interval:
+                self._warnings[name] = (last, suppressed + 1)
+                return
+            self._warnings[name] = (now, 0)
+        if suppressed:
+            message = f"{message} (repeated {suppressed} more times)"
+        print(message)
+
+    def summary(self):
+        """Mean, p50 and p99 of every stage over the ring buffer, with FPS and counter totals."""
+        with self._lock:
+            rows = list(self.frames)
+            counters = dict(self.counters)
+
+        stages = {}
+        for name in STAGES + ("total",):
+            values = np.array([row[name] for row in rows if name in row])
+            if values.size:
+                stages[name] = {
+                    "mean_ms": float(values.mean()),
+                    "p50_ms": float(np.percentile(values, 50)),
+                    "p99_ms": float(np.percentile(values, 99)),
+                }
+
+        fps = 0.0
+        if len(rows) > 1 and rows[-1]["time"] > rows[0]["time"]:
+            fps = (len(rows) - 1) / (rows[-1]["time"] - rows[0]["time"])
+        return {"frames": len(rows), "fps": fps, "stages": stages, "counters": counters}
+
+    def format_summary(self):
+        """Short multi-line text version of summary() for on-screen display."""
+        summary = self.summary()
+        lines = [f"{summary['fps']:.1f} fps over {summary['frames']} frames"]
+        for name, stats in summary["stages"].items():
+            lines.append(f"{name:<12}{stats['mean_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name:<20}{value}")
+        return "\n".join(lines)
+
+    def export_csv(self, path):
+        """Write the ring buffer as one CSV row per frame."""
+        with self._lock:
+            rows = list(self.frames)
+        columns = ["time", "total"] + list(STAGES)
+        extra = sorted({key for row in rows for key in row} - set(columns))
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns + extra)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def export_json(self, path):
+        """Write the summary and every frame row of the ring buffer as JSON."""
+        with self._lock:
+            rows = list(self.frames)
+        with open(path, "w") as f:
+            json.dump({"summary": self.summary(), "frames": rows}, f, indent=2)
+
+    def export(self, path):
+        """Export to JSON for .json paths, CSV otherwise."""
+        if path.lower().endswith(".json"):
+            self.export_json(path)
+        else:
+            self.export_csv(path)
+
+
+# Disabled instance for code paths called without telemetry, its warnings still print
+DISABLED = Telemetry()
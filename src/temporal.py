@@ -0,0 +1,125 @@
+# Frame-to-frame reuse for video: landmark smoothing and skipping unchanged warps
+
+import time
+import numpy as np
+
+
+class OneEuroFilter:
+    """One Euro filter over an array of points, every coordinate filtered independently.
+
+    Slow movements get a low cutoff (less jitter), fast ones a higher cutoff (less lag). min_cutoff
+    is the cutoff in Hz at rest and beta how quickly it rises with speed in pixels per second.
+    """
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None
+        self.timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, points, timestamp):
+        points = np.asarray(points, np.float32)
+        if self.value is None or self.value.shape != points.shape or timestamp <= self.timestamp:
+            self.value = points
+            self.derivative = np.zeros_like(points)
+            self.timestamp = timestamp
+            return points
+
+        dt = timestamp - self.timestamp
+        derivative = (points - self.value) / dt
+        self.derivative += self._alpha(self.d_cutoff, dt) * (derivative - self.derivative)
+        # The cutoff follows each point's speed, not each coordinate's
+        speed = np.linalg.norm(self.derivative, axis=-1, keepdims=True)
+        alpha = self._alpha(self.min_cutoff + self.beta * speed, dt)
+        self.value = self.value + alpha * (points - self.value)
+        self.timestamp = timestamp
+        return self.value
+
+
+class LandmarkSmoother:
+    """One Euro filter per face for the landmark lists returned by the detectors.
+
+    Faces are matched by their left-to-right order, the filters start over whenever the number
+    of faces changes.
+    """
+    def __init__(self, min_cutoff=1.0, beta=0.05):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.filters = []
+
+    def reset(self):
+        self.filters = []
+
+    def smooth(self, faces, timestamp=None):
+        """Return the faces with smoothed, rounded landmark points."""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if len(faces) != len(self.filters):
+            self.filters = [OneEuroFilter(self.min_cutoff, self.beta) for _ in faces]
+        smoothed = []
+        for face_filter, points in zip(self.filters, faces):
+            values = np.rint(face_filter(points, timestamp)).astype(np.int32)
+            smoothed.append([tuple(point) for point in values.tolist()])
+        return smoothed
+
+
+class WarpReuse:
+    """Remembers the last swapped face box so the next frame can skip work that would not change.
+
+    classify() compares the new landmarks of every swapped face with the ones the stored results
+    were made for, a point counts as moved once it is more than threshold pixels away:
+    "static" when no point moved, the stored blend result can be pasted again as is.
+    "incremental" when points moved by at most max_motion pixels and under max_dirty of the
+    triangles are affected, only those triangles need to be warped again.
+    "full" otherwise, or after max_reuse_frames static frames so lighting changes come through.
+    """
+    def __init__(self, threshold=1, max_motion=3, max_dirty=0.5, max_reuse_frames=15):
+        self.threshold = threshold
+        self.max_motion = max_motion
+        self.max_dirty = max_dirty
+        self.max_reuse_frames = max_reuse_frames
+        self.reset()
+
+    def reset(self):
+        self.key = None
+        self.points = None
+        self.reused = 0
+
+    def classify(self, key, points, triangles, incremental=True):
+        """Returns (mode, moved) where moved holds one boolean array of moved points per face."""
+        if key != self.key or len(points) != len(self.points):
+            return "full", None
+        moved = [np.abs(new - old).max(axis=1) > self.threshold for new, old in zip(points, self.points)]
+        if not any(face_moved.any() for face_moved in moved):
+            if self.reused < self.max_reuse_frames:
+                return "static", moved
+            return "full", None
+        if not incremental:
+            return "full", None
+
+        motion = max(int(np.abs(new - old).max()) for new, old in zip(points, self.points))
+        dirty = max(float(face_moved[triangles].any(axis=1).mean()) for face_moved in moved)
+        if motion > self.max_motion or dirty > self.max_dirty:
+            return "full", None
+        return "incremental", moved
+
+    def store(self, key, points, canvas, coverage, blended, mask, reused=False):
+        """Keep this frame's face box results, copies are taken since the arena buffers get reused."""
+        self.reused = self.reused + 1 if reused else 0
+        if reused:
+            return
+        self.key = key
+        self.points = [face.copy() for face in points]
+        self.canvas = canvas.copy()
+        self.coverage = coverage.copy()
+        self.blended = blended.copy()
+        self.mask = mask
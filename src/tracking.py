@@ -0,0 +1,92 @@
+# Keeps landmarks alive between detections with optical flow
+
+import cv2
+import numpy as np
+
+
+class LandmarkTracker:
+    """Runs the landmark detector on keyframes and propagates the points with pyramidal Lucas-Kanade in between.
+
+    A new detection is forced every keyframe_interval frames, or earlier as soon as the share of
+    points tracked within max_error drops below min_confidence on any face.
+    """
+    def __init__(self, detector, keyframe_interval=5, min_confidence=0.8, max_error=12.0,
+                 win_size=(15, 15), max_level=2):
+        self.detector = detector
+        self.keyframe_interval = keyframe_interval
+        self.min_confidence = min_confidence
+        self.max_error = max_error
+        self.lk_params = dict(
+            winSize=win_size,
+            maxLevel=max_level,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.reset()
+
+    def reset(self):
+        """Forget the tracked face so the next frame is a keyframe."""
+        self.prev_gray = None
+        self.prev_points = None
+        self.frames_since_keyframe = 0
+        self.confidence = 0.0
+        self.is_keyframe = False
+
+    def needs_keyframe(self):
+        return (self.prev_points is None
+                or self.frames_since_keyframe >= self.keyframe_interval
+                or self.confidence < self.min_confidence)
+
+    def track(self, image, gray=None):
+        """Return the landmark points of every face for this frame, detected or tracked, [] if none."""
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        faces = None
+        if not self.needs_keyframe():
+            faces = self._propagate(gray)
+
+        if faces is None:
+            detected = self.detector.detect_all(image)
+            if not detected:
+                self.reset()
+                return []
+            faces = np.array(detected, np.float32)
+            self.frames_since_keyframe = 0
+            self.confidence = 1.0
+            self.is_keyframe = True
+        else:
+            self.frames_since_keyframe += 1
+            self.is_keyframe = False
+
+        # gray may be a reused buffer the caller overwrites next frame, so keep a copy of our own
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = gray.copy()
+        else:
+            np.copyto(self.prev_gray, gray)
+        self.prev_points = faces
+        return [[(int(round(x)), int(round(y))) for x, y in face] for face in faces.tolist()]
+
+    def _propagate(self, gray):
+        if self.prev_gray.shape != gray.shape:
+            return None
+
+        # All faces go through a single optical flow call
+        face_count, point_count = self.prev_points.shape[:2]
+        next_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, self.prev_points.reshape(-1, 1, 2), None, **self.lk_params)
+        if next_points is None:
+            self.confidence = 0.0
+            return None
+
+        next_points = next_points.reshape(face_count, point_count, 2)
+        good = ((status.ravel() == 1) & (error.ravel() < self.max_error)).reshape(face_count, point_count)
+        # The worst tracked face decides, any lost face needs a fresh detection
+        self.confidence = float(good.mean(axis=1).min())
+        if self.confidence < self.min_confidence:
+            return None
+
+        # Lost points follow the median motion of the ones that tracked well on the same face
+        for face in range(face_count):
+            face_good = good[face]
+            shift = np.median(next_points[face, face_good] - self.prev_points[face, face_good], axis=0)
+            next_points[face, ~face_good] = self.prev_points[face, ~face_good] + shift
+        return next_points
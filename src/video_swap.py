@@ -0,0 +1,144 @@
+# Face swapping over a whole video file: decode, swap on a process pool, encode in order
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from src.batch import init_worker, swap_frame
+from src.frame_source import VideoFileSource
+
+
+class VideoEncoder:
+    """Writes frames with cv2.VideoWriter on its own thread, fed through a bounded queue."""
+    def __init__(self, output_path, fps, size, fourcc="mp4v", max_queue=8):
+        self.writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self.writer.isOpened():
+            raise ValueError(f"Could not open video writer: {output_path}")
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name="video-encoder", daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        self.frames.put(frame)
+
+    def close(self):
+        """Flush the queued frames and finalize the file."""
+        self.frames.put(None)
+        self.thread.join()
+        self.writer.release()
+
+    def _run(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                return
+            self.writer.write(frame)
+            self.written += 1
+
+
+def copy_frames(input_path, encoder, count):
+    """Re-encode the first count frames of an earlier partial output, used when resuming."""
+    copied = 0
+    with VideoFileSource(input_path) as source:
+        for frame in source:
+            if copied >= count:
+                break
+            encoder.write(frame)
+            copied += 1
+    return copied
+
+
+def run_video(src_image_path, input_path, output_path, workers=None, max_in_flight=None,
+              start_frame=0, swapper_kwargs=None, fourcc="mp4v", report_every=50, log=print):
+    """Swap src_image_path into every frame of input_path and write the result to output_path.
+
+    At most max_in_flight frames are decoded but not yet written, which caps memory. With
+    start_frame > 0 the first start_frame frames are taken from the existing output_path, so an
+    interrupted run can be resumed from the last frame it reported.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    source = VideoFileSource(input_path)
+    if not source.open():
+        raise ValueError(f"Could not open video: {input_path}")
+    fps = source.fps or 30.0
+    total = source.frame_count
+    width = int(source.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(source.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    partial_path = None
+    if start_frame > 0:
+        if not os.path.exists(output_path):
+            raise ValueError(f"Cannot resume, no earlier output at {output_path}")
+        partial_path = output_path + ".partial"
+        os.replace(output_path, partial_path)
+        source.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    encoder = VideoEncoder(output_path, fps, (width, height), fourcc=fourcc, max_queue=max_in_flight)
+    if partial_path is not None:
+        copied = copy_frames(partial_path, encoder, start_frame)
+        if copied < start_frame:
+            log(f"Earlier output only had {copied} frames, resuming from there")
+            start_frame = copied
+            source.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    faces_found = 0
+    done = 0
+    index = start_frame
+    start = time.perf_counter()
+
+    def write_result(future):
+        nonlocal faces_found, done
+        _, result, face_found = future.result()
+        encoder.write(result)
+        faces_found += face_found
+        done += 1
+        if done % report_every == 0:
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed > 0 else 0.0
+            remaining = max(total - start_frame - done, 0)
+            eta = remaining / rate if rate > 0 else 0.0
+            log(f"[frame {start_frame + done}/{total}] {rate:.1f} fps "
+                f"({rate / fps:.2f}x real-time), eta {eta:.0f}s")
+
+    interrupted = False
+    finished = False
+    try:
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(src_image_path, swapper_kwargs)) as executor:
+            # Futures are written strictly in submission order, which re-orders the results
+            in_flight = deque()
+            for frame in source:
+                while len(in_flight) >= max_in_flight:
+                    write_result(in_flight.popleft())
+                in_flight.append(executor.submit(swap_frame, index, frame))
+                index += 1
+            while in_flight:
+                write_result(in_flight.popleft())
+        finished = True
+    except KeyboardInterrupt:
+        interrupted = finished = True
+        log(f"Interrupted, resume with start_frame={start_frame + done}")
+    finally:
+        source.release()
+        encoder.close()
+        # The new output holds every frame the partial one had, unless we crashed midway
+        if partial_path is not None and finished:
+            os.remove(partial_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": done,
+        "frames_with_face": faces_found,
+        "seconds": elapsed,
+        "fps": done / elapsed if elapsed > 0 else 0.0,
+        "next_frame": start_frame + done,
+        "interrupted": interrupted,
+    }
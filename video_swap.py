@@ -0,0 +1,40 @@
+import argparse
+import sys
+from src.blending import BLENDERS
+from src.face_swap import WARP_MODES, TOPOLOGIES
+from src.video_swap import run_video
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Swap one source face into every frame of a video file.")
+    parser.add_argument("source", help="image with the source face")
+    parser.add_argument("input", help="video file to process")
+    parser.add_argument("output", help="video file to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="frames decoded but not yet written (default: twice the workers)")
+    parser.add_argument("--start-frame", type=int, default=0, help="resume an interrupted run from this frame")
+    parser.add_argument("--fourcc", default="mp4v")
+    parser.add_argument("--warp-mode", choices=WARP_MODES, default="dense")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="canonical")
+    parser.add_argument("--blend", choices=list(BLENDERS), default="seamless")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = run_video(
+        args.source, args.input, args.output,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        start_frame=args.start_frame,
+        fourcc=args.fourcc,
+        swapper_kwargs={"warp_mode": args.warp_mode, "topology": args.topology, "blend": args.blend}
+    )
+    print(f"Processed {summary['frames']} frames in {summary['seconds']:.1f}s "
+          f"({summary['fps']:.1f} fps, {summary['frames_with_face']} with a face)")
+    return 1 if summary["interrupted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())